@@ -43,40 +43,76 @@ bl_info = {
 
 
 import bpy
+import sys
+import time
+import numpy as np
 from bpy.types import Operator, PropertyGroup, Mesh, Panel
-from bpy.props import FloatProperty, CollectionProperty, BoolProperty, IntProperty, EnumProperty
-from mathutils import Vector
-from random import uniform
-from math import radians, cos, sin, atan
+from bpy.props import FloatProperty, CollectionProperty, BoolProperty, IntProperty, EnumProperty, StringProperty
+from math import radians, cos
+from mathutils.geometry import interpolate_bezier
+from contextlib import contextmanager
 from .bmesh_utils import BmeshEdit as BmeshHelper
 from .simple_manipulator import Manipulable
-import bmesh
+from .floor_core import FOOT, INCH, Layout, Outline, GeometryCache, GeometryBuffer, MeshData, PARAMS, StageTimer, \
+    fingerprint, build, rings_from_edges, split
+from .floor_core.parallel import core_path
 
 # ------------------------------------------------------------------
 # Constants
 # ------------------------------------------------------------------
 
-FOOT = 0.3048  # 1 foot in meters
-INCH = 0.0254  # 1 inch in meters
 EQUAL, NOT_EQUAL, LESS_EQUAL, GREATER_EQUAL, LESS, GREATER = [i for i in range(6)]
 SLOP = 0.001  # amount of wiggle room in rough_comp
 
+# last tile layout of every floor, by pointer of its archipack_floor,
+# python side of property groups does not persist between calls
+layouts = {}
+
+# mesh arrays of every floor, by pointer of its archipack_floor, reused across updates
+buffers = {}
+
+# generated meshes of recent configurations, shared by every floor
+# set geometry_cache.budget (bytes) to change memory use
+geometry_cache = GeometryCache()
+
+# floors inside a batch_edit block, by pointer, rebuild is deferred to the end of the block
+batch_edits = set()
+
+# properties with an update callback besides floor parameters, compared by batch_edit
+OUTPUT_PARAMS = ('outline', 'instanced', 'chunked', 'chunk_size')
+
 # ------------------------------------------------------------------
 # Define property class to store object parameters and update mesh
 # ------------------------------------------------------------------
 
 
 def update(self, context):
-    if self.auto_update:
+    if self.auto_update and self.as_pointer() not in batch_edits:
         self.update(context)
 
 
-class archipack_floor(Manipulable, PropertyGroup):
-    # keep track of data
-    vs, fs = [], []  # vertices and faces
-    ms, us = [], []  # mat ids and uvs
-    uv_factor = 1  # uv scale factor
+def prune_layouts():
+    """
+        Forget layouts and buffers of floors that no longer exist
+    """
+    alive = {d.as_pointer() for me in bpy.data.meshes for d in me.archipack_floor}
+    for ptr in set(layouts) - alive:
+        del layouts[ptr]
+    for ptr in set(buffers) - alive:
+        del buffers[ptr]
 
+
+class archipack_floor_timing(PropertyGroup):
+    """
+        Last run of an update stage
+    """
+    name = StringProperty(name="Stage")
+    ms = FloatProperty(name="Time", description="Wall time in milliseconds")
+    verts = IntProperty(name="Vertices")
+    faces = IntProperty(name="Faces")
+
+
+class archipack_floor(Manipulable, PropertyGroup):
     auto_update = BoolProperty(
         name="Auto Update Mesh", default=True, update=update,
         description="Automatically update the mesh whenever a parameter is changed"
@@ -108,6 +144,13 @@ class archipack_floor(Manipulable, PropertyGroup):
         subtype="DISTANCE"
     )
 
+    # room shape, overrides width and length
+    outline = StringProperty(
+        name='Outline', update=update,
+        description='Curve or mesh giving the room shape, inner loops are holes, '
+                    'update the floor after editing it'
+    )
+
     # generic spacing
     spacing = FloatProperty(
         name='Spacing', unit='LENGTH', min=0, soft_max=1 * INCH,
@@ -226,7 +269,13 @@ class archipack_floor(Manipulable, PropertyGroup):
 
     # UV stuff
     random_uvs = BoolProperty(
-        name='Random UV\'s', update=update, default=True, description='Random UV positions for the faces'
+        name='Random UV\'s', update=update, default=True, description='Random UV offset for every tile'
+    )
+
+    # random values of every variance and offset
+    seed = IntProperty(
+        name='Seed', min=0, default=0, update=update,
+        description='Random seed, same seed and parameters always give the same floor'
     )
 
     # bevel
@@ -235,429 +284,75 @@ class archipack_floor(Manipulable, PropertyGroup):
     )
     bevel_amount = FloatProperty(
         name='Bevel Amount', update=update, unit='LENGTH', min=0.0001, max=0.005, default=0.001,
-        description='Bevel amount', precision=2, step=0.0005
+        description='Bevel amount, reduced on tiles too small or too thin for it', precision=2, step=0.0005
     )
 
-    @staticmethod
-    def append_all(v_list, add):
-        for i in add:
-            v_list.append(i)
-
-    @staticmethod
-    def create_uv_seams(bm):
-        handled = set()
-        for edge in bm.edges:
-            if edge.verts[0].co.z == 0 and edge.verts[1].co.z == 0:  # bottom
-                # make sure both vertices on the edge haven't been handled, this forces one edge to not be made a seam
-                # leaving the bottom face still attached
-                if not (edge.verts[0].index in handled and edge.verts[1].index in handled):
-                    edge.seam = True
-                    handled.add(edge.verts[0].index)
-                    handled.add(edge.verts[1].index)
-            elif edge.verts[0].co.z != edge.verts[1].co.z:  # not horizontal, so they are vertical seams
-                edge.seam = True
-
-    @staticmethod
-    def rotate_point(point, pivot, angle, units="DEGREES"):
-        if units == "DEGREES":
-            angle = radians(angle)
-
-        x, y = point[0] - pivot[0], point[1] - pivot[1]
-        new_x = (x * cos(angle)) - (y * sin(angle))
-        new_y = (x * sin(angle)) - (y * cos(angle))
-
-        return new_x + pivot[0], new_y + pivot[1]
-
-    # ---------------------------------------------------
-    # Patterns
-    # ---------------------------------------------------
-
-    def regular_tile(self):
-        """
-         ____  ____  ____
-        |    ||    ||    | Regular tile, rows can be offset, either manually or randomly
-        |____||____||____|
-           ____  ____  ____
-          |    ||    ||    |
-          |____||____||____| 
-        """
-        off = False
-        o = 1 / (100 / self.offset) if self.offset != 0 else 0
-        cur_y = 0.0
-
-        while cur_y < self.length:
-            cur_x = 0.0
-            tl2 = self.tile_length
-            if cur_y < self.length < cur_y + self.tile_length:
-                tl2 = self.length - cur_y
-
-            while cur_x < self.width:
-                tw2 = self.tile_width
-
-                if cur_x < self.width < cur_x + self.tile_width:
-                    tw2 = self.width - cur_x
-                elif cur_x == 0.0 and off and not self.random_offset:
-                    tw2 = self.tile_width * o
-                elif cur_x == 0.0 and self.random_offset:
-                    v = self.tile_width * self.offset_variance * 0.0049
-                    tw2 = uniform((self.tile_width / 2) - v, (self.tile_width / 2) + v)
-
-                self.add_plane(cur_x, cur_y, tw2, tl2)
-                cur_x += tw2 + self.spacing
-
-            cur_y += tl2 + self.spacing
-            off = not off
-
-    def hopscotch(self):
-        """
-         ____  _  Large tile, plus small one on top right corner
-        |    ||_|
-        |____| ____  _  But shifted up so next large one is right below previous small one
-              |    ||_|
-              |____| 
-        """
-        cur_y = 0
-        sp = self.spacing
-
-        # movement variables
-        row = 0
-
-        tw = self.tile_width
-        tl = self.tile_length
-        s_tw = (tw - sp) / 2  # small tile width
-        s_tl = (tl - sp) / 2  # small tile length
-
-        pre_y = cur_y
-        while cur_y < self.length or (row == 2 and cur_y - s_tl - sp < self.length):
-            cur_x = 0
-            step_back = True
-
-            if row == 1:  # row start indented slightly
-                cur_x = s_tw + sp
-
-            while cur_x < self.width:
-                if row == 0 or row == 1:
-                    # adjust for if there is a need to cut off the bottom of the tile
-                    if cur_y < 0:
-                        self.add_plane(cur_x, 0, tw, tl + cur_y)  # large one
-                    else:
-                        self.add_plane(cur_x, cur_y, tw, tl)  # large one
-
-                    self.add_plane(cur_x + tw + sp, cur_y + s_tl + sp, s_tw, s_tl)  # small one
-
-                    if step_back:
-                        cur_x += tw + sp
-                        cur_y -= s_tl + sp
-                    else:
-                        cur_x += tw + s_tw + 2*sp
-                        cur_y += s_tl + sp
-
-                    step_back = not step_back
-                else:
-                    if cur_x == 0:  # half width for starting position
-                        self.add_plane(cur_x, cur_y, s_tw, tl)  # large one
-                        # small one on right
-                        self.add_plane(cur_x + s_tw + sp, cur_y + s_tl + sp, s_tw, s_tl)
-                        # small one on bottom
-                        self.add_plane(cur_x, cur_y - sp - s_tl, s_tw, s_tl)
-                        cur_x += (2 * s_tw) + tw + (3 * sp)
-                    else:
-                        self.add_plane(cur_x, cur_y, tw, tl)  # large one
-                        # small one on right
-                        self.add_plane(cur_x + tw + sp, cur_y + s_tl + sp, s_tw, s_tl)
-                        cur_x += (2 * tw) + (3*sp) + s_tw
-
-            if row == 0 or row == 2:
-                cur_y = pre_y + tl + sp
-            else:
-                cur_y = pre_y + s_tl + sp
-            pre_y = cur_y
-
-            row = (row + 1) % 3  # keep wrapping rows
-
-    def stepping_stone(self):
-        """
-         ____  __  ____
-        |    ||__||    | Row of large one, then two small ones stacked beside it
-        |    | __ |    |
-        |____||__||____|
-         __  __  __  __
-        |__||__||__||__| Row of smalls
-        """
-        sp = self.spacing
-        cur_y = 0.0
-        row = 0
-
-        tw = self.tile_width
-        tl = self.tile_length
-        s_tw = (tw - sp) / 2
-        s_tl = (tl - sp) / 2
-
-        while cur_y < self.length:
-            cur_x = 0
-
-            while cur_x < self.width:
-                if row == 0:  # large one then two small ones stacked beside it
-                    self.add_plane(cur_x, cur_y, tw, tl)
-                    self.add_plane(cur_x + tw + sp, cur_y, s_tw, s_tl,)
-                    self.add_plane(cur_x + tw + sp, cur_y + s_tl + sp, s_tw, s_tl)
-                    cur_x += tw + s_tw + (2 * sp)
-                else:  # row of small ones
-                    self.add_plane(cur_x, cur_y, s_tw, s_tl)
-                    self.add_plane(cur_x + s_tw + sp, cur_y, s_tw, s_tl)
-                    cur_x += tw + sp
-
-            if row == 0:
-                cur_y += tl + sp
-            else:
-                cur_y += s_tl + sp
-
-            row = (row + 1) % 2
-
-    def hexagon(self):
-        """
-          __  Hexagon tiles
-        /   \
-        \___/ 
-        """
-        sp = self.spacing
-        width = self.tile_width
-        dia = (width / 2) / cos(radians(30))
-        #               top of current, half way up next,    vertical spacing component
-        vertical_spacing = dia * (1 + sin(radians(30))) + (sp * sin(radians(60)))  # center of one row to next row
-        base_points = [self.rotate_point((dia, 0), (0, 0), ang + 30) for ang in range(0, 360, 60)]
-
-        cur_y = 0
-        offset = False
-        while cur_y - width / 2 < self.length:  # place tile as long as bottom is still within bounds
-            if offset:
-                cur_x = width / 2
-            else:
-                cur_x = -sp / 2
-
-            while cur_x - width / 2 < self.width:  # place tile as long as left is still within bounds
-                p = len(self.vs)
-                for pt in base_points:
-                    self.vs.append((pt[0] + cur_x, pt[1] + cur_y, 0))
-                self.fs.append([p] + [i for i in range(len(self.vs) - 1, p, -1)])
-
-                cur_x += width + sp
-
-            cur_y += vertical_spacing
-            offset = not offset
-
-    def windmill(self):
-        """
-         __  ____
-        |  ||____| This also has a square one in the middle, totaling 5 tiles per pattern
-        |__|   __
-         ____ |  |
-        |____||__|  
-        """
-        sp = self.spacing
-
-        tw = self.tile_width
-        tl = self.tile_length
-        s_tw = (tw - sp) / 2
-        s_tl = (tl - sp) / 2
-
-        cur_y = 0
-        while cur_y < self.length:
-            cur_x = 0
-
-            while cur_x < self.width:
-                self.add_plane(cur_x, cur_y, tw, s_tl)  # bottom
-                self.add_plane(cur_x + tw + sp, cur_y, s_tw, tl)  # right
-                self.add_plane(cur_x + s_tw + sp, cur_y + tl + sp, tw, s_tl)  # top
-                self.add_plane(cur_x, cur_y + s_tl + sp, s_tw, tl)  # left
-                self.add_plane(cur_x + s_tw + sp, cur_y + s_tl + sp, s_tw, s_tl)  # center
-
-                cur_x += tw + s_tw + (2*sp)
-            cur_y += tl + s_tl + (2*sp)
-
-    def boards(self):
-        """
-        ||| Typical wood boards
-        |||
-        """
-        cur_x = 0.0
-        bw, bl = self.board_width, self.board_length
-
-        while cur_x < self.width:
-            if self.vary_width:
-                v = bw * (self.width_variance / 100) * 0.99
-                bw2 = uniform(bw - v, bw + v)
-            else:
-                bw2 = bw
-
-            if bw2 + cur_x > self.width:
-                bw2 = self.width - cur_x
-            cur_y = 0.0
-
-            counter = 1
-            while cur_y < self.length:
-                bl2 = bl
-                if self.vary_length:
-                    v = bl * (self.length_variance / 100) * 0.99
-                    bl2 = uniform(bl - v, bl + v)
-                if (counter >= self.max_boards and self.vary_length) or cur_y + bl2 > self.length:
-                    bl2 = self.length - cur_y
-
-                self.add_plane(cur_x, cur_y, bw2, bl2)
-                cur_y += bl2 + self.length_spacing
-                counter += 1
+    # output
+    instanced = BoolProperty(
+        name='Instances', update=update, default=False,
+        description='One mesh per repeated tile shape, duplicated on faces of child objects, '
+                    'smaller files and less memory, uvs are per shape'
+    )
+    chunked = BoolProperty(
+        name='Chunks', update=update, default=False,
+        description='Split the floor in child objects, one per square chunk, only changed chunks are rebuilt'
+    )
+    chunk_size = FloatProperty(
+        name='Chunk Size', update=update, unit='LENGTH', min=0.5, soft_max=50, default=4,
+        precision=2, description='Side of chunks, tiles go to the chunk holding their center'
+    )
+    chunk_processes = IntProperty(
+        name='Processes', min=0, default=1,
+        description='Number of processes building chunks, 0 for one per cpu, 1 to build in blender'
+    )
 
-            cur_x += bw2 + self.width_spacing
+    # timing of last update, by stage, eg: {t.name: t.ms for t in d.timings}
+    timings = CollectionProperty(type=archipack_floor_timing)
+    show_timings = BoolProperty(
+        name='Timings', default=False, description='Show time spent in every stage of last update'
+    )
 
-    def square_parquet(self):
+    @contextmanager
+    def batch_edit(self, context=None):
         """
-        ||--||-- Alternating groups oriented either horizontally, or forwards and backwards.
-        ||--||-- self.spacing is used because it is the same spacing for width and length
-        --||--|| Board width is calculated using number of boards and the length.
-        --||--||
+        Defer mesh rebuild until the end of the block, then update once if any parameter changed
+            with d.batch_edit() as changed:
+                d.pattern = 'hexagon'
+                d.tile_width = 0.2
+        :return: set, filled with names of changed parameters when the block ends
         """
-        cur_x = 0.0
-        start_orient_length = True
-
-        # figure board width
-        bl = self.short_board_length
-        bw = (bl - (self.boards_in_group - 1) * self.spacing) / self.boards_in_group
-        while cur_x < self.width:
-            cur_y = 0.0
-            orient_length = start_orient_length
-            while cur_y < self.length:
-
-                if orient_length:
-                    start_x = cur_x
-
-                    for i in range(self.boards_in_group):
-                        if cur_x < self.width and cur_y < self.length:
-                            self.add_plane(cur_x, cur_y, bw, bl)
-                            cur_x += bw + self.spacing
-
-                    cur_x = start_x
-                    cur_y += bl + self.spacing
-
-                else:
-                    for i in range(self.boards_in_group):
-                        if cur_x < self.width and cur_y < self.length:
-                            self.add_plane(cur_x, cur_y, bl, bw)
-                            cur_y += bw + self.spacing
+        ptr = self.as_pointer()
+        if ptr in batch_edits:
+            # nested block, outer one does the update
+            yield set()
+            return
 
-                orient_length = not orient_length
+        if context is None:
+            context = bpy.context
+        before = {attr: getattr(self, attr) for attr in PARAMS + OUTPUT_PARAMS}
+        changed = set()
+        batch_edits.add(ptr)
+        try:
+            yield changed
+        finally:
+            batch_edits.discard(ptr)
+        changed.update(attr for attr in before if getattr(self, attr) != before[attr])
 
-            start_orient_length = not start_orient_length
-            cur_x += bl + self.spacing
+        if changed and self.auto_update:
+            o = next((o for o in context.scene.objects if o.data == self.id_data), None)
+            if o is not None:
+                self.update_as_active(context, o)
 
-    def herringbone(self):
+    def update_as_active(self, context, o):
         """
-        Boards are at 45 degree angle, in chevron pattern, ends are angled 
+        Update the floor of object o, update only works on active object
         """
-        width_dif = self.board_width / cos(radians(45))
-        x_dif = self.short_board_length * cos(radians(45))
-        y_dif = self.short_board_length * sin(radians(45))
-        total_y_dif = width_dif + y_dif
-        sp_dif = self.spacing / cos(radians(45))
-
-        cur_y = -y_dif
-        while cur_y < self.length:
-            cur_x = 0
-
-            while cur_x < self.width:
-                # left side
-                p = len(self.vs)
-                self.append_all(
-                    self.vs,
-                    [(cur_x, cur_y, 0), (cur_x + x_dif, cur_y + y_dif, 0),
-                     (cur_x + x_dif, cur_y + total_y_dif, 0), (cur_x, cur_y + width_dif, 0)]
-                )
-                self.fs.append([p + 3, p + 2, p + 1, p])
-                cur_x += x_dif + self.spacing
-
-                # right side
-                if cur_x < self.width:
-                    p = len(self.vs)
-                    self.append_all(
-                        self.vs,
-                        [(cur_x, cur_y + y_dif, 0), (cur_x + x_dif, cur_y, 0),
-                         (cur_x + x_dif, cur_y + width_dif, 0), (cur_x, cur_y + total_y_dif, 0)]
-                    )
-                    self.fs.append([p + 3, p + 2, p + 1, p])
-                    cur_x += x_dif + self.spacing
-
-            cur_y += width_dif + sp_dif  # adjust spacing amount for 45 degree angle
-
-    def herringbone_parquet(self):
-        """
-        Boards are at 45 degree angle, in chevron pattern, ends are square, not angled
-        """
-        x_dif = self.short_board_length * cos(radians(45))
-        y_dif = self.short_board_length * sin(radians(45))
-        y_dif_45 = self.board_width * cos(radians(45))
-        x_dif_45 = self.board_width * sin(radians(45))
-        total_y_dif = y_dif + y_dif_45
-
-        sp_dif = (self.spacing / cos(radians(45))) / 2  # divide by two since it is used for both x and y
-        width_dif = self.board_width / cos(radians(45))
-
-        cur_y = -y_dif
-        while cur_y - y_dif_45 < self.length:  # continue as long as bottom left corner is still good
-            cur_x = 0
-            pre_y = cur_y
-
-            while cur_x - x_dif_45 < self.width:  # continue as long as top left corner is still good
-                # left side
-                p = len(self.vs)
-                self.append_all(
-                    self.vs,
-                    [(cur_x, cur_y, 0), (cur_x + x_dif, cur_y + y_dif, 0),
-                     (cur_x + x_dif - x_dif_45, cur_y + total_y_dif, 0), (cur_x - x_dif_45, cur_y + y_dif_45, 0)]
-                )
-                self.fs.append([p + 3, p + 2, p + 1, p])
-                cur_x += x_dif - x_dif_45 + sp_dif
-                cur_y += y_dif - y_dif_45 - sp_dif
-
-                if cur_x < self.width:
-                    p = len(self.vs)
-                    self.append_all(
-                        self.vs,
-                        [(cur_x, cur_y, 0), (cur_x + x_dif, cur_y - y_dif, 0),
-                         (cur_x + x_dif + x_dif_45, cur_y - y_dif + y_dif_45, 0),
-                         (cur_x + x_dif_45, cur_y + y_dif_45, 0)]
-                    )
-                    self.fs.append([p + 3, p + 2, p + 1, p])
-                    cur_x += x_dif + x_dif_45 + sp_dif
-                    cur_y -= y_dif - y_dif_45 - sp_dif
-                else:  # we didn't place the right board, so step ahead far enough the the while loop for x breaks
-                    cur_x = self.width + x_dif_45
-
-            cur_y = pre_y + width_dif + (2*sp_dif)
-
-    # --------------------------------------------------
-    # Non-pattern functions
-    # --------------------------------------------------
-
-    def add_plane(self, x, y, w, l, clip=True):
-        """
-        Adds vertices and faces for a place, clip to outer boundaries if clip is True
-        :param x: start x position
-        :param y: start y position
-        :param w: width (in x direction)
-        :param l: length (in y direction)
-        :param clip: trim back plane to be within length and width  
-        """
-        # if starting point is greater than bounds, don't even bother
-        if clip and (x >= self.width or y >= self.length):
-            return
-
-        if clip and x + w > self.width:
-            w = self.width - x
-        if clip and y + l > self.length:
-            l = self.length - y
-
-        p = len(self.vs)
-        self.append_all(self.vs, [(x, y, 0), (x + w, y, 0), (x + w, y + l, 0), (x, y + l, 0)])
-        self.fs.append([p + 3, p + 2, p + 1, p])
+        old = context.scene.objects.active
+        state = o.select
+        context.scene.objects.active = o
+        self.update(context)
+        o.select = state
+        context.scene.objects.active = old
 
     def add_manipulator(self, name, pt1, pt2, pt3):
         m = self.manipulators.add()
@@ -676,34 +371,65 @@ class archipack_floor(Manipulable, PropertyGroup):
         if mats == 2 and not self.add_grout:  # remove grout
             obj.data.materials.pop(1, update_data=True)
 
-    def generate_pattern(self):
-        # clear data before refreshing it
-        self.vs, self.fs, self.ms, self.us = [], [], [], []
-        self.uv_factor = 1 / max(self.width, self.length)  # automatically scale to keep within reasonable bounds
+    def generate_pattern(self, outline=None):
+        """
+        Tile outlines of current pattern, clipped to the floor
+        :param outline: Outline of the room, see outline_shape
+        :return: TileSet
+        """
+        if outline is not None:
+            return outline.fill(self)
+        # only regenerate border tiles when width / length change
+        return layouts.setdefault(self.as_pointer(), Layout()).generate(self)
 
-        if self.pattern == "boards":
-            self.boards()
-        elif self.pattern == "square_parquet":
-            self.square_parquet()
-        elif self.pattern == "herringbone":
-            self.herringbone()
-        elif self.pattern == "herringbone_parquet":
-            self.herringbone_parquet()
-        elif self.pattern == "regular_tile":
-            self.regular_tile()
-        elif self.pattern == "hopscotch":
-            self.hopscotch()
-        elif self.pattern == "stepping_stone":
-            self.stepping_stone()
-        elif self.pattern == "hexagon":
-            self.hexagon()
-        elif self.pattern == "windmill":
-            self.windmill()
+    def outline_shape(self, context):
+        """
+        Room shape of the outline object, in floor object space
+        :return: Outline, None when not set or not usable
+        """
+        shape = context.scene.objects.get(self.outline)
+        o = next((o for o in context.scene.objects if o.data == self.id_data), None)
+        if shape is None or o is None or shape.type not in {'CURVE', 'MESH'}:
+            return None
+
+        matrix = o.matrix_world.inverted() * shape.matrix_world
+        if shape.type == 'CURVE':
+            rings = [[(matrix * co).to_2d() for co in self.spline_points(s, shape.data.resolution_u)]
+                     for s in shape.data.splines if s.use_cyclic_u]
+        else:
+            # boundary edges, used by one face, every edge of meshes without faces
+            mesh = shape.data
+            users = {}
+            for p in mesh.polygons:
+                for key in p.edge_keys:
+                    users[key] = users.get(key, 0) + 1
+            edges = [key for key, n in users.items() if n == 1] if users else [e.vertices[:] for e in mesh.edges]
+            verts = [(matrix * v.co).to_2d() for v in mesh.vertices]
+            rings = rings_from_edges(verts, edges) if edges else []
+        try:
+            return Outline(rings)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def spline_points(spline, resolution):
+        """
+        Points of a closed spline, bezier segments sampled at resolution
+        """
+        if spline.type != 'BEZIER':
+            return [p.co.to_3d() for p in spline.points]
+        pts = []
+        bp = spline.bezier_points
+        for i in range(len(bp)):
+            p0, p1 = bp[i], bp[(i + 1) % len(bp)]
+            pts.extend(interpolate_bezier(p0.co, p0.handle_right, p1.handle_left, p1.co, resolution + 1)[:-1])
+        return pts
 
     def update_manipulators(self):
         self.manipulators.clear()  # clear every time, add new ones
-        self.add_manipulator("length", (0, 0, 0), (0, self.length, 0), (-0.4, 0, 0))
-        self.add_manipulator("width", (0, 0, 0), (self.width, 0, 0), (0.4, 0, 0))
+        if self.outline == '':
+            self.add_manipulator("length", (0, 0, 0), (0, self.length, 0), (-0.4, 0, 0))
+            self.add_manipulator("width", (0, 0, 0), (self.width, 0, 0), (0.4, 0, 0))
 
         z = self.thickness
 
@@ -732,24 +458,58 @@ class archipack_floor(Manipulable, PropertyGroup):
                 self.add_manipulator("tile_length", (0, tl / 2 + self.spacing, z), (0, tl * 1.5 + self.spacing, z),
                                      (0, 0, z))
 
+    def buffer(self):
+        """
+        GeometryBuffer holding the mesh of last update
+        """
+        return buffers.setdefault(self.as_pointer(), GeometryBuffer())
+
+    def write_mesh(self, context, o, mesh, auto_smooth=True):
+        """
+        Write MeshData to o, converted in place into the buffer of this floor
+        """
+        buf = self.buffer()
+        buf.assign(mesh)
+        BmeshHelper.bulkmesh(context, o, buf.verts, buf.loops, buf.totals, matids=buf.matids,
+                             uvs=buf.uvs if mesh.uvs is not None else None, auto_smooth=auto_smooth)
+
+    @staticmethod
+    def write_child(context, o, mesh):
+        """
+        Write MeshData to a child object, not kept in the buffer
+        """
+        BmeshHelper.bulkmesh(context, o, mesh.verts, mesh.loops, mesh.totals, matids=mesh.matids, uvs=mesh.uvs)
+
+    # views of last mesh, no copy
     @property
     def verts(self):
-        return self.vs
+        return self.buffer().verts
 
     @property
     def faces(self):
-        return self.fs
+        return self.buffer().faces
 
     @property
     def uvs(self):
-        return self.us
+        return self.buffer().uvs
 
     @property
     def matids(self):
-        return self.ms
+        return self.buffer().matids
 
-    def update(self, context):
+    def generate_mesh(self, timer=None, outline=None):
+        """
+        Closed tiles with uvs, tops come first, then grout
+        :return: number of tiles, MeshData or Instances when instanced
+        """
+        tiles, mesh = build(self, layouts.setdefault(self.as_pointer(), Layout()), timer=timer, outline=outline,
+                            instanced=self.instanced)
+        return len(tiles), mesh
 
+    def update(self, context, use_cache=True):
+        """
+        Rebuild the mesh, reusing the cached one of same parameters when use_cache
+        """
         old = context.active_object
 
         o, props = ARCHIPACK_PT_floor.params(old)
@@ -758,115 +518,218 @@ class archipack_floor(Manipulable, PropertyGroup):
 
         o.select = True
         context.scene.objects.active = o
+        prune_layouts()
+
+        timer = StageTimer()
+        outline = None
+        if self.outline:
+            with timer.stage('outline'):
+                outline = self.outline_shape(context)
+        if self.chunked:
+            # only changed chunks are rebuilt, fast enough without preview
+            self.update_chunks(context, o, timer, outline)
+        elif self.manipulable_preview:
+            # handle dragged, flat tile tops only, full build in manipulable_release
+            self.update_preview(context, o, timer, outline)
+        else:
+            self.update_mesh(context, o, use_cache, timer, outline)
 
-        self.generate_pattern()  # update vertices and faces
-        self.confirm_materials(o)  # update materials
-        BmeshHelper.buildmesh(context, o, self.verts, self.faces)
-
-        # needs bisected?
-        bisect = self.pattern in ('hexagon', 'herringbone', 'herringbone_parquet')
-        for mod in o.modifiers:
-            if mod.type == 'BOOLEAN':
-                bisect = False
-
-        if bisect:
-            BmeshHelper.bissect(context, o, Vector((0, 0, 0)), Vector((0, -1, 0)))  # bottom
-            BmeshHelper.bissect(context, o, Vector((0, self.length, 0)), Vector((0, 1, 0)))  # top
-            BmeshHelper.bissect(context, o, Vector((0, 0, 0)), Vector((-1, 0, 0)))  # left
-            BmeshHelper.bissect(context, o, Vector((self.width, 0, 0)), Vector((1, 0, 0)))  # right
-
-        # create bmesh to edit
-        bm = bmesh.new()
-        bm.from_mesh(o.data)
-        bm.verts.ensure_lookup_table()
-
-        # extrude
-        bmesh.ops.solidify(bm, geom=bm.faces, thickness=1)
-        bm.verts.ensure_lookup_table()
-        bm.faces.ensure_lookup_table()
-
-        # thickness
-        faces = []
-        for face in bm.faces:
-            if face.verts[0].co.z > 0.9:  # the thickness above is one, allow for some rounding error
-                # calculate thickness
-                if self.vary_thickness:
-                    off = 1 / (100 / self.thickness_variance) if self.thickness_variance != 0 else 0
-                    v = off * self.thickness
-                    z = uniform(self.thickness - v, self.thickness + v)
-                else:
-                    z = self.thickness
-
-                # apply thickness to every vertex in the face
-                for vertex in face.verts:
-                    bm.verts[vertex.index].co.z = z
+        # update manipulators
+        with timer.stage('manipulators'):
+            self.update_manipulators()
+        self.store_timings(timer)
 
-                faces.append(face)
+        # restore context
+        old.select = True
+        context.scene.objects.active = old
 
-        # bevel if needed
-        if self.bevel:
-            geometry = []
-            for face in faces:
-                self.append_all(geometry, face.edges)
-                self.append_all(geometry, face.verts)
+    def update_preview(self, context, o, timer, outline=None):
+        """
+        Cheap mesh while dragging a handle: flat tile tops, no uvs, bevel nor grout
+        """
+        with timer.stage('pattern') as s:
+            tiles = self.generate_pattern(outline)
+            s.verts, s.faces = int(tiles.counts.sum()), len(tiles)
+        with timer.stage('write') as s:
+            mesh = MeshData(*tiles.to_mesh(z=self.thickness))
+            self.write_mesh(context, o, mesh, auto_smooth=False)
+            s.verts, s.faces = len(mesh.verts), len(mesh.totals)
+
+    def cache_key(self, outline=None):
+        return fingerprint(self) + (None if outline is None else outline.key, self.instanced)
+
+    def update_mesh(self, context, o, use_cache=True, timer=None, outline=None):
+        """
+        Full mesh, closed tiles with uvs, chamfers and grout
+        """
+        if timer is None:
+            timer = StageTimer()
+        with timer.stage('cache'):
+            key = self.cache_key(outline)
+            cached = geometry_cache.get(key) if use_cache else None
+        if cached is None:
+            cached = self.generate_mesh(timer, outline)
+            geometry_cache.put(key, cached)
+        n_tiles, mesh = cached
+
+        with timer.stage('write') as s:
+            self.confirm_materials(o)  # update materials
+            self.remove_objects(c for c in o.children if 'archipack_floor_chunk' in c)
+            if self.instanced:
+                self.write_instances(context, o, mesh)
+                mesh = mesh.rest
+            else:
+                self.write_instances(context, o, None)
+            self.write_mesh(context, o, mesh)
+            s.verts, s.faces = len(mesh.verts), len(mesh.totals)
 
-            bmesh.ops.bevel(bm, geom=geometry, offset=self.bevel_amount, segments=1, profile=0.5)
+    def write_instances(self, context, o, instances):
+        """
+        One child of o per prototype, duplicating a prototype object on its faces,
+        children are created or removed to match instances, None to remove them all
+        """
+        emitters = sorted((c for c in o.children if 'archipack_floor_shape' in c),
+                          key=lambda c: c['archipack_floor_shape'])
+        count = 0 if instances is None else len(instances.shapes)
+        self.remove_objects(emitters[count:])
+
+        for i in range(count):
+            if i < len(emitters):
+                emitter = emitters[i]
+                proto = emitter.children[0]
+            else:
+                name = "{}_shape".format(o.name)
+                emitter = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+                emitter['archipack_floor_shape'] = i
+                emitter.dupli_type = 'FACES'
+                emitter.parent = o
+                proto = bpy.data.objects.new(name + "_tile", bpy.data.meshes.new(name + "_tile"))
+                proto.parent = emitter
+                context.scene.objects.link(emitter)
+                context.scene.objects.link(proto)
+
+            BmeshHelper.bulkmesh(context, emitter, *instances.emitter(i), auto_smooth=False)
+            self.write_child(context, proto, instances.shapes[i])
+            self.share_materials(o, proto)
+
+    def update_chunks(self, context, o, timer, outline=None):
+        """
+        One child of o per chunk, only chunks whose content changed are rebuilt and written
+        """
+        with timer.stage('pattern') as s:
+            tiles = self.generate_pattern(outline)
+            s.verts, s.faces = int(tiles.counts.sum()), len(tiles)
+
+        with timer.stage('cache') as s:
+            chunks = split(self, tiles, self.chunk_size, outline)
+            keys = [c.key(self) for c in chunks]
+            objects = {c['archipack_floor_chunk']: c for c in o.children if 'archipack_floor_chunk' in c}
+            names = ["{},{}".format(*c.cell) for c in chunks]
+            todo = [i for i, name in enumerate(names)
+                    if name not in objects or objects[name].get('archipack_floor_key') != keys[i] or
+                    'archipack_floor_uv_factor' not in objects[name]]
+            # cached meshes with the uv scale they were built with
+            meshes = {i: geometry_cache.get(keys[i]) for i in todo}
+            missing = [i for i in todo if meshes[i] is None]
+            for i in todo:
+                if meshes[i] is not None:
+                    meshes[i] = self.rescale_chunk(chunks[i], *meshes[i])
+
+        with timer.stage('mesh') as s:
+            if self.chunk_processes != 1 and len(missing) > 1:
+                core = headless_core()
+                built = core.parallel.build_chunks(
+                    core.FloorParams.from_object(self), [chunks[i].state() for i in missing],
+                    pool=core.parallel.shared_pool(self.chunk_processes, bpy.app.binary_path_python))
+                for j, mesh, seconds in built:
+                    meshes[missing[j]] = mesh
+            else:
+                for i in missing:
+                    meshes[i] = chunks[i].mesh(self)
+            for i in missing:
+                geometry_cache.put(keys[i], (chunks[i].factor, meshes[i]))
+            s.verts = sum(len(meshes[i].verts) for i in missing)
+            s.faces = sum(len(meshes[i].totals) for i in missing)
+
+        with timer.stage('write') as s:
+            self.confirm_materials(o)
+            self.write_instances(context, o, None)
+            self.remove_objects(c for name, c in objects.items() if name not in set(names))
+            self.buffer().clear()
+            if len(o.data.vertices) > 0:
+                BmeshHelper.bulkmesh(context, o, [], [], [])
+            for i in todo:
+                c = objects.get(names[i])
+                if c is None:
+                    name = "{}_chunk".format(o.name)
+                    c = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+                    c['archipack_floor_chunk'] = names[i]
+                    c.parent = o
+                    context.scene.objects.link(c)
+                self.write_child(context, c, meshes[i])
+                self.share_materials(o, c)
+                c['archipack_floor_key'] = keys[i]
+                c['archipack_floor_uv_factor'] = chunks[i].factor
+            # kept chunks follow the uv scale of the floor
+            for i in set(range(len(chunks))) - set(todo):
+                c = objects[names[i]]
+                if c['archipack_floor_uv_factor'] != chunks[i].factor and c.data.uv_layers.active is not None:
+                    data = c.data.uv_layers.active.data
+                    uvs = np.empty(2 * len(data), dtype=np.float32)
+                    data.foreach_get("uv", uvs)
+                    uvs = chunks[i].rescale_uvs(self, uvs.reshape(-1, 2), c['archipack_floor_uv_factor'])
+                    data.foreach_set("uv", uvs.astype(np.float32).ravel())
+                    c['archipack_floor_uv_factor'] = chunks[i].factor
+            s.verts = sum(len(meshes[i].verts) for i in todo)
+            s.faces = sum(len(meshes[i].totals) for i in todo)
+
+    def rescale_chunk(self, chunk, factor, mesh):
+        """
+        Mesh of chunk built with uv scale factor, with the uv scale of the floor
+        """
+        if factor == chunk.factor or mesh.uvs is None:
+            return mesh
+        return MeshData(mesh.verts, mesh.loops, mesh.totals, mesh.matids, chunk.rescale_uvs(self, mesh.uvs, factor),
+                        mesh.normals, mesh.convex)
 
-        # add material id's before adding grout
-        for face in bm.faces:
-            face.material_index = 0
+    @staticmethod
+    def share_materials(o, child):
+        """
+        Give child the materials of o
+        """
+        while len(child.data.materials) > 0:
+            child.data.materials.pop(0, update_data=True)
+        for mat in o.data.materials:
+            child.data.materials.append(mat)
 
-        # grout
-        if self.add_grout:
-            # add cube then adjust vertex positions
-            grout_geometry = bmesh.ops.create_cube(bm, size=1.0)
-            z = self.thickness - self.mortar_depth
-
-            for vertex in grout_geometry['verts']:
-                # x
-                if vertex.co.x > 0:
-                    vertex.co.x = self.width
-                elif vertex.co.x < 0:
-                    vertex.co.x = 0
-                # y
-                if vertex.co.y > 0:
-                    vertex.co.y = self.length
-                elif vertex.co.y < 0:
-                    vertex.co.y = 0
-                # z
-                if vertex.co.z > 0:
-                    vertex.co.z = z
-                elif vertex.co.z < 0:
-                    vertex.co.z = 0
-
-                # material id for grout
-                for face in vertex.link_faces:
-                    face.material_index = 1
-
-        # create seams
-        self.create_uv_seams(bm)
-
-        # free bmesh
-        bm.to_mesh(o.data)
-        bm.free()
-
-        # unwrap since mesh has now been updated
-        if context.mode != "EDIT_MESH":
-            bpy.ops.object.editmode_toggle()
-
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.uv.unwrap()
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        if context.mode == "EDIT_MESH":
-            bpy.ops.object.editmode_toggle()
+    @staticmethod
+    def remove_objects(objects):
+        """
+        Remove objects, their children and meshes left without users
+        """
+        for c in list(objects):
+            for child in list(c.children) + [c]:
+                me = child.data
+                bpy.data.objects.remove(child, do_unlink=True)
+                if me is not None and me.users == 0:
+                    bpy.data.meshes.remove(me)
+
+    def store_timings(self, timer):
+        """
+        Keep stages of last update in timings
+        """
+        self.timings.clear()
+        for stage in timer.stages:
+            t = self.timings.add()
+            t.name, t.ms, t.verts, t.faces = stage.name, stage.ms, stage.verts, stage.faces
 
-        # update manipulators
-        self.update_manipulators()
+    def manipulable_release(self, context):
+        if self.manipulable_preview:
+            self.manipulable_preview = False
+            self.update(context)
 
-        # restore context
-        old.select = True
-        context.scene.objects.active = old
+    def manipulable_exit(self, context):
+        self.manipulable_release(context)
 
 # ------------------------------------------------------------------
 # Define panel class to show object parameters in ui panel (N)
@@ -896,8 +759,10 @@ class ARCHIPACK_PT_floor(Panel):
         layout.separator()
 
         # overall measurements
-        layout.prop(props, 'width')
-        layout.prop(props, 'length')
+        layout.prop_search(props, 'outline', context.scene, 'objects')
+        if not props.outline:
+            layout.prop(props, 'width')
+            layout.prop(props, 'length')
 
         # thickness
         layout.separator()
@@ -963,12 +828,33 @@ class ARCHIPACK_PT_floor(Panel):
             layout.prop(props, 'bevel_amount')
 
         # uv
+        layout.separator()
+        layout.prop(props, 'random_uvs', icon='GROUP_UVS')
+        layout.prop(props, 'seed')
 
         # updating
         layout.separator()
         layout.prop(props, 'auto_update', icon='FILE_REFRESH')
         if not props.auto_update:
             layout.operator('archipack.floor_update')
+        layout.prop(props, 'chunked', icon='MESH_GRID')
+        if props.chunked:
+            layout.prop(props, 'chunk_size')
+            layout.prop(props, 'chunk_processes')
+        else:
+            layout.prop(props, 'instanced', icon='MOD_ARRAY')
+
+        # timings of last update
+        layout.separator()
+        layout.prop(props, 'show_timings', icon='TRIA_DOWN' if props.show_timings else 'TRIA_RIGHT', emboss=False)
+        if props.show_timings:
+            box = layout.box()
+            for t in props.timings:
+                row = box.row()
+                row.label(t.name)
+                row.label("{:.1f} ms".format(t.ms))
+                row.label("{} / {}".format(t.verts, t.faces) if t.faces else "")
+            box.label("Total {:.1f} ms".format(sum(t.ms for t in props.timings)))
 
     @classmethod
     def params(cls, o):
@@ -1058,12 +944,103 @@ class ARCHIPACK_OT_floor_update(Operator):
             if props is None:
                 return
 
-            props.update(context)
+            props.update(context, use_cache=False)
             return {'FINISHED'}
         else:
             self.report({'WARNING'}, "Option only valid in Object mode")
             return {'CANCELLED'}
 
+
+def headless_core():
+    """
+        floor_core imported as a top level package,
+        process pool workers can import this one without blender
+    """
+    if core_path not in sys.path:
+        sys.path.append(core_path)
+    import floor_core
+    return floor_core
+
+
+class ARCHIPACK_OT_floor_update_all(Operator):
+    bl_idname = "archipack.floor_update_all"
+    bl_label = "Update All Floors"
+    bl_description = "Update every floor of the scene, building them in parallel"
+    bl_category = 'Sample'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    processes = IntProperty(
+        name="Processes", min=0, default=0,
+        description="Number of processes, 0 for one per cpu"
+    )
+    use_cache = BoolProperty(
+        name="Use Cache", default=False,
+        description="Only build floors without cached mesh"
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT"
+
+    def execute(self, context):
+        floors = [(o, d) for o, d in (ARCHIPACK_PT_floor.params(o) for o in context.scene.objects)
+                  if d is not None]
+        if len(floors) == 0:
+            self.report({'INFO'}, "No floor to update")
+            return {'CANCELLED'}
+
+        start = time.perf_counter()
+        shapes = [d.outline_shape(context) if d.outline else None for o, d in floors]
+        keys = [d.cache_key(shape) for (o, d), shape in zip(floors, shapes)]
+        # chunked floors only rebuild their changed chunks when applied
+        todo = [i for i, key in enumerate(keys)
+                if not floors[i][1].chunked and not (self.use_cache and key in geometry_cache)]
+        timings = {i: [0, 0, 0] for i in range(len(floors))}  # tiles, build, apply seconds
+
+        wm = context.window_manager
+        wm.progress_begin(0, len(floors))
+        done = 0
+
+        # apply every result on main thread as soon as it is available
+        core = headless_core()
+        params = [core.FloorParams.from_object(floors[i][1]) for i in todo]
+        outlines = [None if shapes[i] is None else core.Outline(shapes[i].rings) for i in todo]
+        instanced = [floors[i][1].instanced for i in todo]
+        for j, n_tiles, mesh, seconds in core.parallel.build_all(params, self.processes, bpy.app.binary_path_python,
+                                                                 outlines, instanced):
+            i = todo[j]
+            geometry_cache.put(keys[i], (n_tiles, mesh))
+            timings[i][0:2] = n_tiles, seconds
+            timings[i][2] = self.apply(context, *floors[i])
+            done += 1
+            wm.progress_update(done)
+
+        for i in set(range(len(floors))) - set(todo):
+            timings[i][2] = self.apply(context, *floors[i])
+            done += 1
+            wm.progress_update(done)
+
+        wm.progress_end()
+
+        # summary, slowest first
+        print("Floors built by {} processes".format(core.parallel.pool_size(self.processes, len(todo))))
+        print("{:<24} {:>9} {:>9} {:>9}".format("object", "tiles", "build (s)", "apply (s)"))
+        for i in sorted(timings, key=lambda i: -sum(timings[i][1:])):
+            print("{:<24} {:>9} {:>9.3f} {:>9.3f}".format(floors[i][0].name, *timings[i]))
+        self.report({'INFO'}, "Updated {} floors in {:.2f}s, {} built".format(
+            len(floors), time.perf_counter() - start, len(todo)))
+        return {'FINISHED'}
+
+    @staticmethod
+    def apply(context, o, d):
+        """
+            write cached mesh to object
+            :return: seconds
+        """
+        t = time.perf_counter()
+        d.update_as_active(context, o)
+        return time.perf_counter() - t
+
 # ------------------------------------------------------------------
 # Define operator class to manipulate object
 # ------------------------------------------------------------------
@@ -1116,12 +1093,16 @@ class TOOLS_PT_parametric_object(Panel):
         box.label("Objects")
         row = box.row(align=True)
         row.operator("archipack.floor")
+        row = box.row(align=True)
+        row.operator("archipack.floor_update_all")
 
 
 def register():
+    bpy.utils.register_class(archipack_floor_timing)
     bpy.utils.register_class(archipack_floor)
     bpy.utils.register_class(ARCHIPACK_OT_floor_manipulate)
     bpy.utils.register_class(ARCHIPACK_OT_floor_update)
+    bpy.utils.register_class(ARCHIPACK_OT_floor_update_all)
     bpy.utils.register_class(ARCHIPACK_OT_floor)
     bpy.utils.register_class(ARCHIPACK_PT_floor)
     bpy.utils.register_class(TOOLS_PT_parametric_object)
@@ -1130,12 +1111,20 @@ def register():
 
 def unregister():
     bpy.utils.unregister_class(archipack_floor)
+    bpy.utils.unregister_class(archipack_floor_timing)
     bpy.utils.unregister_class(ARCHIPACK_OT_floor_manipulate)
     bpy.utils.unregister_class(ARCHIPACK_OT_floor_update)
+    bpy.utils.unregister_class(ARCHIPACK_OT_floor_update_all)
     bpy.utils.unregister_class(ARCHIPACK_OT_floor)
     bpy.utils.unregister_class(ARCHIPACK_PT_floor)
     bpy.utils.unregister_class(TOOLS_PT_parametric_object)
     del Mesh.archipack_floor
+    layouts.clear()
+    buffers.clear()
+    geometry_cache.clear()
+    if 'floor_core' in sys.modules:
+        # worker pools of chunk updates
+        sys.modules['floor_core'].parallel.close_pools()
 
 
 if __name__ == "__main__":
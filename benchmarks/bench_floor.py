@@ -0,0 +1,263 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Benchmark of floor generation, runs without blender
+#   python benchmarks/bench_floor.py --out new.json
+#   python benchmarks/bench_floor.py --out new.json --compare old.json
+#   python benchmarks/bench_floor.py --check
+# Sweeps every pattern over square floors and tile / board sizes,
+# records wall time, tiles, verts, faces and peak memory of every stage
+# --check compares incremental Layout meshes with full floor_mesh instead
+# ----------------------------------------------------------
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from floor_core import FOOT, INCH, FloorParams, Layout, build, patterns, floor_mesh  # noqa: E402
+
+PATTERNS = ('boards', 'regular_tile', 'hexagon', 'herringbone', 'herringbone_parquet',
+            'hopscotch', 'stepping_stone', 'windmill', 'square_parquet')
+FLOOR_SIZES = (2, 8, 32, 128, 512)  # feet, square floors
+TILE_SIZES = (2, 4, 12, 24)  # inches
+QUICK_FLOOR_SIZES = (2, 32)
+QUICK_TILE_SIZES = (4, 24)
+
+# successive edits of a floor checked by --check, resizes and prism parameter changes
+CHECK_EDITS = ({'width': 2.5}, {'length': 3.2}, {'thickness': 0.05}, {'width': 3, 'length': 2},
+               {'bevel': True}, {'width': 3.5}, {'seed': 7}, {'vary_thickness': True, 'random_uvs': False},
+               {'length': 4})
+
+
+def floor_params(pattern, floor_size, tile_size, **kwargs):
+    """
+        FloorParams of a square floor of floor_size feet, tiles and boards
+        scaled from tile_size inches, clamped to archipack_floor minimums
+    """
+    s = tile_size * INCH
+    return FloorParams(
+        pattern=pattern, width=floor_size * FOOT, length=floor_size * FOOT,
+        tile_width=s, tile_length=s, board_width=s,
+        short_board_length=max(4 * s, 6 * INCH), board_length=max(16 * s, 2 * FOOT),
+        **kwargs)
+
+
+def estimate_tiles(d):
+    """
+        Rough number of tiles, to skip cases too large for the machine
+    """
+    if d.pattern == 'boards':
+        size = d.board_width * d.board_length
+    elif d.pattern in ('herringbone', 'herringbone_parquet', 'square_parquet'):
+        size = d.board_width * d.short_board_length
+    else:
+        size = d.tile_width * d.tile_length / 2
+    return d.width * d.length / size
+
+
+def run_stages(d):
+    """
+        Run every stage once
+        :return: list of (stage, seconds, result)
+    """
+    stages = []
+    t = time.perf_counter()
+    tiles = patterns.generate(d)
+    stages.append(('pattern', time.perf_counter() - t, tiles))
+    t = time.perf_counter()
+    mesh = floor_mesh(d, tiles)
+    stages.append(('mesh', time.perf_counter() - t, mesh))
+    return stages
+
+
+def peak_memory(d):
+    """
+        Peak traced memory of every stage in bytes, numpy allocations included
+    """
+    peaks = {}
+    tracemalloc.start()
+    tiles = patterns.generate(d)
+    peaks['pattern'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    tracemalloc.start()
+    floor_mesh(d, tiles)
+    peaks['mesh'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peaks
+
+
+def bench_case(d, repeat, memory):
+    """
+        Records of one case, best time over repeat runs
+    """
+    best = {}
+    for i in range(repeat):
+        for stage, seconds, result in run_stages(d):
+            if stage not in best or seconds < best[stage][0]:
+                best[stage] = (seconds, result)
+    peaks = peak_memory(d) if memory else {}
+
+    tiles = len(best['pattern'][1])
+    records = []
+    for stage in ('pattern', 'mesh'):
+        seconds, result = best[stage]
+        if stage == 'pattern':
+            verts, faces = int(result.counts.sum()), tiles
+        else:
+            verts, faces = len(result.verts), len(result.totals)
+        records.append({
+            'stage': stage, 'seconds': seconds, 'tiles': tiles,
+            'verts': verts, 'faces': faces, 'peak_bytes': peaks.get(stage)
+            })
+    records.append({
+        'stage': 'total', 'seconds': sum(r['seconds'] for r in records), 'tiles': tiles,
+        'verts': records[-1]['verts'], 'faces': records[-1]['faces'],
+        'peak_bytes': max(peaks.values()) if peaks else None
+        })
+    return records
+
+
+def run(pattern_names, floor_sizes, tile_sizes, repeat=3, seed=0, max_tiles=2e6, memory=True, log=print):
+    results = []
+    for pattern in pattern_names:
+        for floor_size in floor_sizes:
+            for tile_size in tile_sizes:
+                d = floor_params(pattern, floor_size, tile_size, seed=seed)
+                case = {'pattern': pattern, 'floor_ft': floor_size, 'tile_in': tile_size}
+                if estimate_tiles(d) > max_tiles:
+                    results.append(dict(case, stage='total', skipped=True))
+                    log("{:<20} {:>4} ft {:>3} in  skipped".format(pattern, floor_size, tile_size))
+                    continue
+                for record in bench_case(d, repeat, memory):
+                    results.append(dict(case, **record))
+                total = results[-1]
+                log("{:<20} {:>4} ft {:>3} in {:>9} tiles {:>9.4f} s".format(
+                    pattern, floor_size, tile_size, total['tiles'], total['seconds']))
+    return results
+
+
+def check_layouts(pattern_names, log=print):
+    """
+        Mesh of a Layout edited by CHECK_EDITS against floor_mesh of the same tiles
+        :return: number of mismatching edits
+    """
+    fields = ('verts', 'loops', 'totals', 'matids', 'uvs', 'normals', 'convex')
+    failures = 0
+    for pattern in pattern_names:
+        d = FloorParams(pattern=pattern, width=2, length=2, add_grout=True)
+        layout = Layout()
+        build(d, layout)
+        for edit in CHECK_EDITS:
+            d = d.copy(**edit)
+            tiles, mesh = build(d, layout)
+            ref = floor_mesh(d, tiles)
+            bad = [f for f in fields if not np.array_equal(getattr(mesh, f), getattr(ref, f))]
+            if bad:
+                failures += 1
+                log("{:<20} {} differs in {}".format(pattern, edit, ', '.join(bad)))
+    log("{} layout mismatches".format(failures))
+    return failures
+
+
+def case_key(record):
+    return record['pattern'], record['floor_ft'], record['tile_in'], record['stage']
+
+
+def compare(old, new, threshold=1.25, min_seconds=0.001):
+    """
+        Records of new slower than threshold times old
+        :return: list of (old record, new record, ratio)
+    """
+    old_records = {case_key(r): r for r in old['results'] if not r.get('skipped')}
+    slower = []
+    for r in new['results']:
+        o = old_records.get(case_key(r))
+        if o is None or r.get('skipped') or max(o['seconds'], r['seconds']) < min_seconds:
+            continue
+        ratio = r['seconds'] / max(o['seconds'], 1e-9)
+        if ratio > threshold:
+            slower.append((o, r, ratio))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark floor generation")
+    parser.add_argument('--out', default='bench_floor.json', help="json results file")
+    parser.add_argument('--patterns', nargs='+', default=PATTERNS, choices=PATTERNS)
+    parser.add_argument('--floor-sizes', nargs='+', type=float, help="square floor sizes in feet")
+    parser.add_argument('--tile-sizes', nargs='+', type=float, help="tile and board sizes in inches")
+    parser.add_argument('--quick', action='store_true', help="small sweep")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of every case, best time is kept")
+    parser.add_argument('--seed', type=int, default=0, help="seed of random patterns")
+    parser.add_argument('--max-tiles', type=float, default=2e6, help="skip cases with more estimated tiles")
+    parser.add_argument('--no-memory', action='store_true', help="skip peak memory measurement")
+    parser.add_argument('--compare', help="previous json results, exit with 1 on regression")
+    parser.add_argument('--threshold', type=float, default=1.25, help="slowdown ratio reported as regression")
+    parser.add_argument('--check', action='store_true', help="check incremental layouts, exit with 1 on mismatch")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return 1 if check_layouts(args.patterns) else 0
+
+    floor_sizes = args.floor_sizes or (QUICK_FLOOR_SIZES if args.quick else FLOOR_SIZES)
+    tile_sizes = args.tile_sizes or (QUICK_TILE_SIZES if args.quick else TILE_SIZES)
+
+    results = run(args.patterns, floor_sizes, tile_sizes, args.repeat, args.seed, args.max_tiles,
+                  not args.no_memory)
+    data = {
+        'meta': {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'system': platform.system(),
+            'processor': platform.processor(),
+            'repeat': args.repeat,
+            'seed': args.seed
+            },
+        'results': results
+        }
+    with open(args.out, 'w') as f:
+        json.dump(data, f, indent=1)
+    print("Results written to {}".format(args.out))
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        slower = compare(old, data, args.threshold)
+        for o, r, ratio in slower:
+            print("{:<20} {:>4} ft {:>3} in {:<8} {:>9.4f} s -> {:>9.4f} s  x{:.2f}".format(
+                r['pattern'], r['floor_ft'], r['tile_in'], r['stage'], o['seconds'], r['seconds'], ratio))
+        print("{} regressions over x{} against {}".format(len(slower), args.threshold, args.compare))
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
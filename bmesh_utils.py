@@ -26,6 +26,7 @@
 # ----------------------------------------------------------
 import bpy
 import bmesh
+import numpy as np
 
 
 class BmeshEdit():
@@ -103,6 +104,56 @@ class BmeshEdit():
             bpy.ops.mesh.delete_loose()
         bpy.ops.object.mode_set(mode='OBJECT')
 
+    @staticmethod
+    def _clear(me):
+        """
+            private, remove all geometry and uv layers of mesh, keep datablock and properties
+        """
+        bm = bmesh.new()
+        bm.to_mesh(me)
+        bm.free()
+
+    @staticmethod
+    def bulkmesh(context, o, verts, loops, totals, matids=None, uvs=None, auto_smooth=True):
+        """
+            build mesh of object from flat arrays in a few foreach_set calls,
+            without bmesh nor edit mode
+            verts: (v, 3) vertex coords
+            loops: (l,) vertex index of every face corner
+            totals: (f,) number of corners of every face
+            matids: (f,) material index of every face
+            uvs: (l, 2) uv of every face corner
+        """
+        me = o.data
+        BmeshEdit._clear(me)
+
+        co = np.asarray(verts, dtype=np.float32).reshape(-1)
+        loops = np.asarray(loops, dtype=np.int32).reshape(-1)
+        totals = np.asarray(totals, dtype=np.int32).reshape(-1)
+        nf = len(totals)
+
+        me.vertices.add(len(co) // 3)
+        me.vertices.foreach_set("co", co)
+        me.loops.add(len(loops))
+        me.loops.foreach_set("vertex_index", loops)
+        me.polygons.add(nf)
+        me.polygons.foreach_set("loop_start", (np.cumsum(totals) - totals).astype(np.int32))
+        me.polygons.foreach_set("loop_total", totals)
+
+        if matids is not None:
+            me.polygons.foreach_set("material_index", np.asarray(matids, dtype=np.int32).reshape(-1))
+
+        me.polygons.foreach_set("use_smooth", np.full(nf, auto_smooth, dtype=bool))
+        if auto_smooth:
+            me.use_auto_smooth = True
+
+        me.update(calc_edges=True)
+
+        if uvs is not None:
+            me.uv_textures.new()
+            me.uv_layers[-1].data.foreach_set("uv", np.asarray(uvs, dtype=np.float32).reshape(-1))
+            me.update()
+
     @staticmethod
     def addmesh(context, o, verts, faces, matids=None, uvs=None, weld=False, clean=False, auto_smooth=True):
         bm = BmeshEdit._start(context, o)
@@ -0,0 +1,44 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Floor geometry core
+# numpy only, must not import bpy, bmesh or mathutils
+# headless use, with the addon directory in sys.path:
+#   import floor_core
+#   tiles, mesh = floor_core.build(floor_core.FloorParams(pattern='hexagon'))
+# ----------------------------------------------------------
+from .geometry import TileSet, MeshData, rects, mesh_to_lists, mesh_from_lists
+from .clipping import clip_halfplane, clip_convex, clip_rect
+from .prism import TILE, GROUT, tile_thickness, uv_offsets, uv_factor, prisms, grout_area, grout, floor_mesh
+from .motif import Motif
+from .rng import Streams, hash_keys
+from .layout import Layout
+from .instance import Instances, canonical, instances
+from .chunks import Chunk, split
+from .outline import Outline, rings_from_edges
+from .cache import GeometryCache, MESH_PARAMS, fingerprint
+from .buffer import GeometryBuffer
+from .params import FOOT, INCH, PARAMS, FloorParams
+from .timing import Stage, StageTimer
+from .floor import build
+from . import patterns, parallel, stream, export
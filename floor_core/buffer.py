@@ -0,0 +1,124 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Geometry buffer of a floor
+# Arrays in the types of blender foreach_set, reused across regenerations,
+# capacity only grows, so updates of similar size are converted in place
+# and written to blender without allocating
+# ----------------------------------------------------------
+import numpy as np
+from .geometry import MeshData
+
+GROWTH = 1.5  # capacity factor when a buffer grows
+
+# name: (dtype, row shape), as expected by foreach_set
+LAYOUT = (
+    ('verts', np.float32, (3, )),
+    ('loops', np.int32, ()),
+    ('totals', np.int32, ()),
+    ('matids', np.int32, ()),
+    ('uvs', np.float32, (2, ))
+    )
+
+
+class GeometryBuffer():
+    """
+        Mesh arrays of a floor, verts, loops, totals, matids and uvs are views of the used part
+            buf = GeometryBuffer()
+            buf.assign(mesh)
+            buf.verts  # (v, 3) float32 view, no copy
+        views are only valid until the next assign
+    """
+    def __init__(self):
+        self.arrays = {name: np.empty((0, ) + shape, dtype=dtype) for name, dtype, shape in LAYOUT}
+        self.used = {name: 0 for name, dtype, shape in LAYOUT}
+        self.allocations = 0
+
+    def reserve(self, name, n):
+        """
+            Make room for n rows of name, existing rows are not kept
+        """
+        a = self.arrays[name]
+        if len(a) < n:
+            self.arrays[name] = np.empty((max(n, int(len(a) * GROWTH)), ) + a.shape[1:], dtype=a.dtype)
+            self.allocations += 1
+
+    def assign(self, mesh):
+        """
+            Convert mesh arrays into the buffer, reallocating only when larger than capacity
+        """
+        for name, dtype, shape in LAYOUT:
+            src = getattr(mesh, name)
+            n = 0 if src is None else len(src)
+            self.reserve(name, n)
+            if n > 0:
+                self.arrays[name][:n] = src
+            self.used[name] = n
+
+    def clear(self):
+        for name in self.used:
+            self.used[name] = 0
+
+    def view(self, name):
+        return self.arrays[name][:self.used[name]]
+
+    @property
+    def verts(self):
+        return self.view('verts')
+
+    @property
+    def loops(self):
+        return self.view('loops')
+
+    @property
+    def totals(self):
+        return self.view('totals')
+
+    @property
+    def matids(self):
+        return self.view('matids')
+
+    @property
+    def uvs(self):
+        return self.view('uvs')
+
+    @property
+    def faces(self):
+        """
+            vertex indexes of every face, as views of loops
+        """
+        totals = self.totals
+        return np.split(self.loops, np.cumsum(totals)[:-1]) if len(totals) > 0 else []
+
+    def mesh(self):
+        """
+            MeshData of views of the buffer
+        """
+        return MeshData(self.verts, self.loops, self.totals, self.matids, self.uvs)
+
+    @property
+    def nbytes(self):
+        """
+            allocated bytes
+        """
+        return sum(a.nbytes for a in self.arrays.values())
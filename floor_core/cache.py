@@ -0,0 +1,123 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# LRU cache of generated floor geometry
+# ----------------------------------------------------------
+from collections import OrderedDict
+from .patterns import PATTERN_PARAMS
+
+# parameters changing the generated mesh
+MESH_PARAMS = PATTERN_PARAMS + (
+    'thickness', 'vary_thickness', 'thickness_variance', 'add_grout', 'mortar_depth', 'random_uvs',
+    'bevel', 'bevel_amount'
+    )
+
+
+def fingerprint(d):
+    """
+        Canonical key of the mesh of d, random values only depend on d.seed
+    """
+    return tuple((attr, getattr(d, attr)) for attr in MESH_PARAMS)
+
+
+def nbytes(value):
+    """
+        Memory used by numpy arrays of value, either an array,
+        an object with array attributes or a tuple of those
+    """
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(v) for v in value)
+    if hasattr(value, 'nbytes'):
+        return value.nbytes
+    if hasattr(value, '__dict__'):
+        return sum(nbytes(v) for v in value.__dict__.values())
+    return 0
+
+
+class GeometryCache():
+    """
+        Least recently used cache of generated geometry
+        budget: max memory used by cached arrays in bytes,
+        least recently used entries are evicted above budget
+        hits, misses: lookup counters
+    """
+    def __init__(self, budget=256 * 1024 * 1024):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """
+            Cached value of key or None, key becomes the most recently used
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value):
+        """
+            Store value under key, values larger than budget are not stored
+        """
+        self.discard(key)
+        size = nbytes(value)
+        if size > self.budget:
+            return
+        self.entries[key] = (value, size)
+        self.size += size
+        self.evict()
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def evict(self):
+        """
+            Drop least recently used entries until size fits in budget
+        """
+        while self.size > self.budget and self.entries:
+            key, entry = self.entries.popitem(last=False)
+            self.size -= entry[1]
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def reset_stats(self):
+        self.hits, self.misses = 0, 0
+
+    def __repr__(self):
+        return "GeometryCache({} entries, {:.1f} / {:.1f} MB, {} hits, {} misses)".format(
+            len(self.entries), self.size / 1048576, self.budget / 1048576, self.hits, self.misses)
@@ -0,0 +1,145 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Chunked output
+# Tiles go to the chunk of a square grid holding their centroid,
+# grout is cut along chunk sides, every chunk is meshed on its own
+# and keyed by its content, so only changed chunks are rebuilt,
+# uvs use the scale of the single floor mesh and are rescaled
+# on chunks kept when that scale changes
+# ----------------------------------------------------------
+import hashlib
+import numpy as np
+from .geometry import TileSet
+from .clipping import clip_rect
+from .prism import grout_area, floor_mesh, loop_values, uv_factor, uv_offsets
+
+# parameters changing the mesh of a chunk of given tiles
+CHUNK_PARAMS = (
+    'seed', 'thickness', 'vary_thickness', 'thickness_variance', 'add_grout', 'mortar_depth', 'random_uvs',
+    'bevel', 'bevel_amount'
+    )
+
+
+def centroids(tiles):
+    """
+        (n, 2) mean of the points of every tile
+    """
+    valid = np.arange(tiles.pts.shape[1])[None, :] < tiles.counts[:, None]
+    return (tiles.pts * valid[..., None]).sum(axis=1) / tiles.counts[:, None]
+
+
+class Chunk():
+    """
+        Part of a floor
+        cell: (i, j) chunk of the grid, covering origin + (i, j) * size to origin + (i + 1, j + 1) * size
+        tiles: TileSet of tiles whose centroid is in the cell, unclipped
+        area: TileSet of grout area inside the cell
+        factor: uv scale of the single floor mesh, not part of the key, see rescale_uvs
+    """
+    def __init__(self, cell, tiles, area, factor):
+        self.cell = cell
+        self.tiles = tiles
+        self.area = area
+        self.factor = factor
+
+    def state(self):
+        """
+            plain values of the chunk, to send it to processes importing another copy of floor_core
+        """
+        return (self.cell, self.tiles.pts, self.tiles.counts, self.tiles.ids,
+                self.area.pts, self.area.counts, self.factor)
+
+    @staticmethod
+    def from_state(state):
+        cell, pts, counts, ids, area_pts, area_counts, factor = state
+        return Chunk(cell, TileSet(pts, counts, ids), TileSet(area_pts, area_counts), factor)
+
+    def key(self, d):
+        """
+            Digest of chunk content and parameters of its mesh
+        """
+        h = hashlib.sha1(repr((self.cell, ) + tuple(getattr(d, p) for p in CHUNK_PARAMS)).encode())
+        for a in (self.tiles.pts, self.tiles.counts, self.tiles.ids, self.area.pts, self.area.counts):
+            if a is not None:
+                h.update(np.ascontiguousarray(a).tobytes())
+        return h.hexdigest()
+
+    def mesh(self, d, rng=None):
+        """
+            MeshData of the chunk, the same faces as the part of a single floor mesh
+        """
+        return floor_mesh(d, self.tiles, rng, factor=self.factor, area=self.area)
+
+    def rescale_uvs(self, d, uvs, factor, rng=None):
+        """
+            uvs of mesh(d) built with uv scale factor, scaled to self.factor
+            :param uvs: (l, 2) uvs of every loop, tiles first then grout
+        """
+        offsets = np.zeros(uvs.shape)
+        if d.random_uvs:
+            chamfered = d.bevel and d.bevel_amount > 0
+            tile = loop_values(uv_offsets(d, self.tiles.ids, rng), self.tiles.counts, chamfered=chamfered)
+            offsets[:len(tile)] = tile
+        return (uvs - offsets) * (self.factor / factor) + offsets
+
+
+def split(d, tiles, size, outline=None):
+    """
+        Chunks of a floor holding tiles or grout, ordered by cell,
+        uvs are the ones of the single floor mesh
+        :param size: side of chunks
+        :param outline: Outline tiles were clipped to
+        :return: list of Chunk
+    """
+    origin = np.zeros(2) if outline is None else outline.bounds[0:2]
+    factor = uv_factor(d, outline)
+    cells = np.floor((centroids(tiles) - origin) / size).astype(np.int64)
+
+    # grout area cut along chunk sides
+    area = grout_area(d, outline) if d.add_grout else TileSet(np.zeros((0, 4, 2)), np.zeros(0, dtype=np.int64))
+    parts = {}
+    if len(area) > 0:
+        b = area.bounds()
+        i0, j0 = np.floor((b[:, 0:2].min(axis=0) - origin) / size).astype(np.int64)
+        i1, j1 = np.floor((b[:, 2:4].max(axis=0) - origin) / size).astype(np.int64)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                x, y = origin + (i * size, j * size)
+                part = clip_rect(area, x, y, x + size, y + size)
+                if len(part) > 0:
+                    parts[(i, j)] = part
+
+    # tiles grouped by cell
+    order = np.lexsort((cells[:, 1], cells[:, 0]))
+    cells = cells[order]
+    starts = np.concatenate(([0], np.nonzero((np.diff(cells, axis=0) != 0).any(axis=1))[0] + 1))
+    groups = {}
+    for s, e in zip(starts.tolist(), np.append(starts[1:], len(order)).tolist()):
+        if e > s:
+            groups[tuple(cells[s].tolist())] = tiles.select(order[s:e])
+
+    empty = tiles.select(np.zeros(len(tiles), dtype=bool))
+    empty_area = area.select(np.zeros(len(area), dtype=bool))
+    return [Chunk(cell, groups.get(cell, empty), parts.get(cell, empty_area), factor)
+            for cell in sorted(set(groups) | set(parts))]
@@ -0,0 +1,171 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Batch floor generator, runs without blender
+#   python -m floor_core floors.json --out-dir baked --processes 8
+#   python -m floor_core floors.csv --format glb --report report.json
+# Every floor spec holds archipack_floor parameters (meters), seed,
+# output path and for json specs an optional outline, list of rings
+# of (x, y) points, the first one being the boundary:
+#   [{"pattern": "hexagon", "seed": 3, "output": "hex_3.glb"}, ...]
+# Output format follows the extension: .ply .obj .glb .gltf or .npz
+# for raw geometry arrays (export.read_npz)
+# ----------------------------------------------------------
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import numpy as np
+from .params import DEFAULTS, PARAMS, FloorParams
+from .outline import Outline
+from .patterns import MOTIFS
+from .export import WRITERS
+from .parallel import save_all, pool_size
+
+PATTERNS = ('boards', 'regular_tile') + tuple(sorted(MOTIFS))
+TRUE = ('1', 'true', 'yes', 'on')
+FALSE = ('0', 'false', 'no', 'off')
+
+
+def _value(attr, value):
+    """
+        Parameter value of the type of its default, from csv text or json
+    """
+    default = dict(DEFAULTS)[attr]
+    if not isinstance(value, str) or isinstance(default, str):
+        return value
+    if isinstance(default, bool):
+        if value.strip().lower() not in TRUE + FALSE:
+            raise ValueError("{} expects a boolean, got {!r}".format(attr, value))
+        return value.strip().lower() in TRUE
+    if isinstance(default, int):
+        return int(value)
+    return float(value)
+
+
+def read_specs(path):
+    """
+        Floor specs of a json file, a list of objects or {"floors": [...]},
+        or of a csv file with a header row, empty cells take default values
+        :return: list of dict
+    """
+    if os.path.splitext(path)[1].lower() == '.csv':
+        with open(path, newline='') as f:
+            return [{k.strip(): v for k, v in row.items() if k and v is not None and v.strip() != ''}
+                    for row in csv.DictReader(f)]
+    with open(path) as f:
+        specs = json.load(f)
+    if isinstance(specs, dict):
+        specs = specs.get('floors', [])
+    return specs
+
+
+def parse_spec(spec, index, out_dir='.', default_format='.ply'):
+    """
+        FloorParams, Outline or None and output path of a spec
+    """
+    spec = dict(spec)
+    path = spec.pop('output', None) or "floor_{:04d}{}".format(index, default_format)
+    if not os.path.splitext(path)[1]:
+        path += default_format
+    path = os.path.join(out_dir, path)
+    if os.path.splitext(path)[1].lower() not in WRITERS:
+        raise ValueError("floor {}: unsupported output {}".format(index, path))
+
+    rings = spec.pop('outline', None)
+    if isinstance(rings, str):
+        rings = json.loads(rings)
+    outline = Outline([np.array(r, dtype=np.float64) for r in rings]) if rings else None
+    try:
+        d = FloorParams(**{attr: _value(attr, value) for attr, value in spec.items() if attr in PARAMS})
+        unknown = sorted(set(spec) - set(PARAMS))
+        if len(unknown) > 0:
+            raise TypeError("Unknown floor parameters: {}".format(", ".join(unknown)))
+        if d.pattern not in PATTERNS:
+            raise ValueError("Unknown pattern {}, use one of {}".format(d.pattern, ", ".join(PATTERNS)))
+    except (TypeError, ValueError) as e:
+        raise ValueError("floor {}: {}".format(index, e))
+    return d, outline, path
+
+
+def run(specs, processes=None, out_dir='.', default_format='.ply', log=print):
+    """
+        Generate and write every floor of specs in a process pool
+        :return: list of job records, dict of totals
+    """
+    jobs = [parse_spec(spec, i, out_dir, default_format) for i, spec in enumerate(specs)]
+    for d, outline, path in jobs:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    records = []
+    t = time.perf_counter()
+    for i, tiles, faces, build, write, error in save_all(
+            [job[0] for job in jobs], [job[2] for job in jobs], processes, outlines=[job[1] for job in jobs]):
+        d, outline, path = jobs[i]
+        records.append({'index': i, 'pattern': d.pattern, 'seed': d.seed, 'output': path, 'tiles': tiles,
+                        'faces': faces, 'build_seconds': build, 'write_seconds': write, 'error': error})
+        if error is None:
+            log("{:>5} {:<20} {:>9} tiles {:>10} faces {:>8.3f} s build {:>8.3f} s write  {}".format(
+                i, d.pattern, tiles, faces, build, write, path))
+        else:
+            log("{:>5} {:<20} failed  {}".format(i, d.pattern, error))
+    wall = time.perf_counter() - t
+
+    done = [r for r in records if r['error'] is None]
+    faces = sum(r['faces'] for r in done)
+    totals = {
+        'floors': len(done), 'failed': len(records) - len(done), 'faces': faces,
+        'processes': pool_size(processes, len(jobs)), 'seconds': wall,
+        'floors_per_second': len(done) / max(wall, 1e-9), 'faces_per_second': faces / max(wall, 1e-9)
+        }
+    log("{floors} floors, {failed} failed, {faces} faces in {seconds:.2f} s on {processes} processes, "
+        "{floors_per_second:.2f} floors/s {faces_per_second:.0f} faces/s".format(**totals))
+    return sorted(records, key=lambda r: r['index']), totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m floor_core', description="Generate floors in batch")
+    parser.add_argument('specs', help="json or csv file of floor specs")
+    parser.add_argument('--out-dir', default='.', help="directory of relative output paths")
+    parser.add_argument('--format', default='ply', choices=[ext[1:] for ext in sorted(WRITERS)],
+                        help="format of outputs without extension")
+    parser.add_argument('--processes', type=int, help="worker processes, default to cpu count")
+    parser.add_argument('--report', help="json file of job times and throughput")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = read_specs(args.specs)
+        records, totals = run(specs, args.processes, args.out_dir, '.' + args.format)
+    except (OSError, ValueError) as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        return 2
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'specs': os.path.abspath(args.specs), 'totals': totals, 'jobs': records}, f, indent=1)
+        print("Report written to {}".format(args.report))
+    return 1 if totals['failed'] > 0 else 0
@@ -0,0 +1,111 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Vectorized Sutherland-Hodgman clipping of TileSet
+# ----------------------------------------------------------
+import numpy as np
+from .geometry import TileSet
+
+AREA_EPSILON = 1e-10  # polygons smaller than this (m2) are dropped after clipping
+
+
+def compact(pts, valid, ids=None):
+    """
+        TileSet keeping valid points in order, removing consecutive duplicates
+        and polygons left with less than 3 points or without area
+        :param pts: (n, k, 2) candidate points
+        :param valid: (n, k) bool, points to keep
+        :param ids: (n,) tile keys
+    """
+    n, k = valid.shape
+    rows = np.arange(n)[:, None]
+    for dedup in (True, False):
+        order = np.argsort(~valid, axis=1, kind='mergesort')
+        counts = valid.sum(axis=1)
+        m = max(1, int(counts.max())) if n > 0 else 1
+        idx = np.minimum(np.arange(m), np.maximum(counts - 1, 0)[:, None])
+        pts = pts[rows, order[rows, idx]]
+        valid = np.arange(m) < counts[:, None]
+        if dedup:
+            dup = np.zeros(valid.shape, dtype=bool)
+            dup[:, 1:] = np.all(pts[:, 1:] == pts[:, :-1], axis=2)
+            last = np.maximum(counts - 1, 0)
+            closing = np.all(pts[np.arange(n), last] == pts[:, 0], axis=1) & (counts > 1)
+            dup[np.arange(n), last] |= closing
+            valid &= ~dup
+
+    tiles = TileSet(pts, counts, ids)
+    return tiles.select((counts > 2) & (tiles.area() > AREA_EPSILON))
+
+
+def clip_halfplane(tiles, nx, ny, c):
+    """
+        Keep the part of every tile where nx * x + ny * y <= c
+        (nx, ny) must be a unit vector
+    """
+    if len(tiles) == 0:
+        return tiles
+    p = tiles.pts
+    n, k = p.shape[:2]
+    q = np.roll(p, 1, axis=1)
+    dp = p[..., 0] * nx + p[..., 1] * ny - c
+    dq = np.roll(dp, 1, axis=1)
+    cur_in = dp <= 0
+    cross = cur_in != (dq <= 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(cross, dq / (dq - dp), 0)
+    inter = q + t[..., None] * (p - q)
+    # snap intersections on the plane so neighbours share exact coords
+    if ny == 0:
+        inter[..., 0] = c / nx
+    elif nx == 0:
+        inter[..., 1] = c / ny
+    # for each edge prev -> cur, emit intersection when crossing, then cur when inside
+    out = np.stack((inter, p), axis=2).reshape(n, 2 * k, 2)
+    valid = np.stack((cross, cur_in), axis=2).reshape(n, 2 * k)
+    return compact(out, valid, tiles.ids)
+
+
+def clip_convex(tiles, planes):
+    """
+        Clip tiles by a convex region given as a list of (nx, ny, c) half planes
+    """
+    for nx, ny, c in planes:
+        tiles = clip_halfplane(tiles, nx, ny, c)
+    return tiles
+
+
+def rect_planes(xmin, ymin, xmax, ymax):
+    return [(-1, 0, -xmin), (1, 0, xmax), (0, -1, -ymin), (0, 1, ymax)]
+
+
+def clip_rect(tiles, xmin, ymin, xmax, ymax):
+    """
+        Clip tiles to a rectangle, only tiles crossing the border are clipped,
+        tiles fully outside are removed, tiles fully inside are left untouched
+    """
+    b = tiles.bounds()
+    inside = (b[:, 0] >= xmin) & (b[:, 1] >= ymin) & (b[:, 2] <= xmax) & (b[:, 3] <= ymax)
+    outside = (b[:, 2] <= xmin) | (b[:, 3] <= ymin) | (b[:, 0] >= xmax) | (b[:, 1] >= ymax)
+    border = clip_convex(tiles.select(~inside & ~outside), rect_planes(xmin, ymin, xmax, ymax))
+    return TileSet.concatenate([tiles.select(inside), border])
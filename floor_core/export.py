@@ -0,0 +1,396 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Mesh export without blender
+#   tiles, mesh = floor_core.build(d)
+#   export.save('floor.glb', mesh)
+# Binary PLY and glTF buffers are written from whole arrays,
+# OBJ text is formatted by blocks of rows as ascii arrays
+# ----------------------------------------------------------
+import os
+import json
+import struct
+import numpy as np
+from .geometry import MeshData
+
+MATERIALS = ('tile', 'grout')  # names of material indexes
+COLORS = ((0.8, 0.8, 0.8, 1), (0.3, 0.3, 0.3, 1))  # base colors of materials
+BLOCK = 65536  # rows of text formatted at once
+DECIMALS = 6  # digits after the point of coords in text formats
+NORMAL_DECIMALS = 4  # digits after the point of normals in text formats, equal ones are shared
+
+# ascii of 0000 to 9999 as little endian uint32
+QUADS = np.frombuffer(''.join('{:04d}'.format(i) for i in range(10000)).encode('ascii'), dtype='<u4')
+
+
+def _polygons(mesh):
+    """
+        Faces grouped by number of corners
+        :return: generator of (t, faces, corners), corners (k, t) loop indexes of the k faces
+    """
+    starts = mesh.starts
+    for t in np.unique(mesh.totals).tolist():
+        faces = np.nonzero(mesh.totals == t)[0]
+        yield t, faces, starts[faces][:, None] + np.arange(t)
+
+
+def _cross(a, b):
+    """
+        cross product of (..., 3) arrays, cheaper than np.cross on large arrays
+    """
+    x = a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1]
+    y = a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2]
+    z = a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+    return np.stack((x, y, z), axis=-1)
+
+
+def face_normals(mesh):
+    """
+        (f, 3) unit normal of every face, as known by the mesh or by newell method
+    """
+    if mesh.normals is not None:
+        return mesh.normals
+    n = np.zeros((len(mesh.totals), 3))
+    for t, faces, corners in _polygons(mesh):
+        # relative to first corner, sides from it do not contribute
+        p = mesh.verts[mesh.loops[corners]]
+        p = p[:, 1:] - p[:, 0:1]
+        n[faces] = _cross(p[:, :-1], p[:, 1:]).sum(axis=1)
+    return n / np.maximum(np.linalg.norm(n, axis=1, keepdims=True), 1e-300)
+
+
+def _ear_clip(p, n):
+    """
+        triangles of a simple polygon (m, 3) with normal n, as (t, 3) indexes of p
+    """
+    idx = list(range(len(p)))
+    tris = []
+
+    def turn(a, b, c):
+        return np.dot(np.cross(p[b] - p[a], p[c] - p[b]), n)
+
+    while len(idx) > 3:
+        for i in range(len(idx)):
+            a, b, c = idx[i - 1], idx[i], idx[(i + 1) % len(idx)]
+            if turn(a, b, c) <= 0:
+                continue
+            if any(turn(a, b, j) >= 0 and turn(b, c, j) >= 0 and turn(c, a, j) >= 0
+                   for j in idx if j not in (a, b, c)):
+                continue
+            tris.append((a, b, c))
+            del idx[i]
+            break
+        else:
+            # degenerate polygon, fan the rest
+            break
+    tris.extend((idx[0], idx[k], idx[k + 1]) for k in range(1, len(idx) - 1))
+    return np.array(tris, dtype=np.int64).reshape(-1, 3)
+
+
+def triangulate(mesh, normals=None):
+    """
+        Triangles of mesh faces, fans for convex faces, ear clipping for concave ones,
+        faces the mesh knows to be convex are not tested
+        :return: (t, 3) loop indexes of triangles, (t,) face of every triangle
+    """
+    if normals is None:
+        normals = face_normals(mesh)
+    tris, face = [], []
+    for t, faces, corners in _polygons(mesh):
+        fan = np.stack((np.repeat(corners[:, 0:1], t - 2, axis=1), corners[:, 1:-1], corners[:, 2:]), axis=2)
+        concave = np.zeros(len(faces), dtype=bool)
+        test = np.ones(len(faces), dtype=bool) if mesh.convex is None else ~mesh.convex[faces]
+        if t > 3 and test.any():
+            # concave faces have a corner turning against their normal
+            p = mesh.verts[mesh.loops[corners[test]]]
+            side = np.roll(p, -1, axis=1) - p
+            turn = _cross(np.roll(side, 1, axis=1), side)
+            concave[test] = ((turn * normals[faces[test]][:, None, :]).sum(axis=2) < -1e-12).any(axis=1)
+            for f, c in zip(faces[concave].tolist(), corners[concave]):
+                tri = c[_ear_clip(mesh.verts[mesh.loops[c]], normals[f])]
+                tris.append(tri)
+                face.append(np.full(len(tri), f))
+        tris.append(fan[~concave].reshape(-1, 3))
+        face.append(np.repeat(faces[~concave], t - 2))
+    if len(tris) == 0:
+        return np.zeros((0, 3), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(tris), np.concatenate(face)
+
+
+def write_ply(path, mesh):
+    """
+        Binary little endian PLY, vertices are split by face corner when mesh has uvs,
+        faces carry their material index and are grouped by number of corners
+    """
+    if mesh.uvs is not None:
+        vertex = np.empty(len(mesh.loops), dtype=[('x', '<f4'), ('y', '<f4'), ('z', '<f4'), ('s', '<f4'), ('t', '<f4')])
+        co = mesh.verts[mesh.loops]
+        vertex['s'], vertex['t'] = mesh.uvs[:, 0], mesh.uvs[:, 1]
+        loops = np.arange(len(mesh.loops))
+    else:
+        vertex = np.empty(len(mesh.verts), dtype=[('x', '<f4'), ('y', '<f4'), ('z', '<f4')])
+        co = mesh.verts
+        loops = mesh.loops
+    vertex['x'], vertex['y'], vertex['z'] = co[:, 0], co[:, 1], co[:, 2]
+
+    header = ["ply", "format binary_little_endian 1.0", "comment archipack floor",
+              "element vertex {}".format(len(vertex))]
+    header += ["property float {}".format(name) for name in vertex.dtype.names]
+    # uchar corner count unless a face has more than 255 corners, eg: grout of round outlines
+    count = 'u1' if len(mesh.totals) == 0 or mesh.totals.max() < 256 else '<u4'
+    header += ["element face {}".format(len(mesh.totals)),
+               "property list {} int vertex_indices".format('uchar' if count == 'u1' else 'uint'),
+               "property int material_index", "end_header"]
+    with open(path, 'wb') as f:
+        f.write(("\n".join(header) + "\n").encode('ascii'))
+        vertex.tofile(f)
+        for t, faces, corners in _polygons(mesh):
+            # packed records of count, t int indexes, int material
+            face = np.empty(len(faces), dtype=[('n', count), ('loops', '<i4', (t, )), ('matid', '<i4')])
+            face['n'] = t
+            face['loops'] = loops[corners]
+            face['matid'] = mesh.matids[faces]
+            face.tofile(f)
+
+
+def _ascii_ints(a, width):
+    """
+        (n,) non negative ints as (n, width) zero padded ascii digits, 4 digits at once
+    """
+    n = -(-width // 4)
+    out = np.empty((len(a), n), dtype='<u4')
+    a = a.astype(np.uint32 if len(a) == 0 or a.max() < 2 ** 32 else np.uint64)
+    for i in range(n - 1, -1, -1):
+        q = a // 10000
+        out[:, i] = QUADS[a - q * 10000]
+        a = q
+    return out.view(np.uint8).reshape(len(out), 4 * n)[:, 4 * n - width:]
+
+
+def _ascii_floats(a, decimals=DECIMALS):
+    """
+        (n,) floats as ascii fixed point numbers, sign or space then zero padded digits
+        :return: list of parts, see _write_lines
+    """
+    scaled = np.rint(np.abs(a) * 10 ** decimals).astype(np.int64)
+    width = max(len(str(int(scaled.max()))) if len(a) > 0 else 0, decimals + 1)
+    digits = _ascii_ints(scaled, width)
+    sign = np.where((a < 0) & (scaled > 0), ord('-'), ord(' ')).astype(np.uint8)[:, None]
+    return [sign, digits[:, :-decimals], b".", digits[:, -decimals:]]
+
+
+def _write_lines(f, parts):
+    """
+        Lines of text made of parts, bytes constants or (n, w) ascii arrays of n rows
+    """
+    n = max(len(p) for p in parts if not isinstance(p, bytes))
+    widths = [len(p) if isinstance(p, bytes) else p.shape[1] for p in parts]
+    out = np.empty((n, sum(widths) + 1), dtype=np.uint8)
+    x = 0
+    for p, w in zip(parts, widths):
+        out[:, x:x + w] = np.frombuffer(p, dtype=np.uint8) if isinstance(p, bytes) else p
+        x += w
+    out[:, -1] = ord("\n")
+    f.write(out.data)
+
+
+def _write_coords(f, prefix, coords, decimals=DECIMALS):
+    for s in range(0, len(coords), BLOCK):
+        block = coords[s:s + BLOCK]
+        parts = [prefix]
+        for c in range(block.shape[1]):
+            parts += [b" "] + _ascii_floats(block[:, c], decimals)
+        _write_lines(f, parts)
+
+
+def write_obj(path, mesh, materials=MATERIALS):
+    """
+        Wavefront OBJ with uvs and flat normals, faces grouped by material in a .mtl next to it,
+        lines are formatted as ascii arrays, numbers have a fixed width
+    """
+    # distinct normals as written, most prism faces share a few directions
+    q = np.ascontiguousarray(np.rint(face_normals(mesh) * 10 ** NORMAL_DECIMALS).astype(np.int64))
+    keys = q.view(np.dtype((np.void, q.dtype.itemsize * 3))).ravel()
+    keys, first, normal_index = np.unique(keys, return_index=True, return_inverse=True)
+    normals = q[first] / 10 ** NORMAL_DECIMALS
+    normal_index = normal_index.ravel()
+    mtl = os.path.splitext(path)[0] + '.mtl'
+    used = np.unique(mesh.matids).tolist()
+    with open(mtl, 'w') as f:
+        for m in used:
+            f.write("newmtl {}\nKd {:.3f} {:.3f} {:.3f}\n".format(materials[m], *COLORS[m % len(COLORS)][0:3]))
+    with open(path, 'wb') as f:
+        f.write("# archipack floor\nmtllib {}\n".format(os.path.basename(mtl)).encode('ascii'))
+        _write_coords(f, b"v", mesh.verts)
+        if mesh.uvs is not None:
+            _write_coords(f, b"vt", mesh.uvs)
+        _write_coords(f, b"vn", normals, NORMAL_DECIMALS)
+        # faces, 1 based v/vt/vn
+        v_width, vt_width, vn_width = (len(str(len(a))) for a in (mesh.verts, mesh.loops, normals))
+        for m in used:
+            f.write("usemtl {}\n".format(materials[m]).encode('ascii'))
+            for t, faces, corners in _polygons(mesh):
+                sel = mesh.matids[faces] == m
+                faces, corners = faces[sel], corners[sel]
+                for s in range(0, len(faces), BLOCK):
+                    c = corners[s:s + BLOCK]
+                    v = _ascii_ints(mesh.loops[c].ravel() + 1, v_width).reshape(len(c), t, v_width)
+                    vn = _ascii_ints(normal_index[faces[s:s + BLOCK]] + 1, vn_width)
+                    parts = [b"f"]
+                    if mesh.uvs is not None:
+                        vt = _ascii_ints(c.ravel() + 1, vt_width).reshape(len(c), t, vt_width)
+                        for k in range(t):
+                            parts += [b" ", v[:, k], b"/", vt[:, k], b"/", vn]
+                    else:
+                        for k in range(t):
+                            parts += [b" ", v[:, k], b"//", vn]
+                    _write_lines(f, parts)
+
+
+def _gltf(mesh, materials):
+    """
+        glTF 2.0 document of mesh, y up, one primitive per material,
+        vertices are split by face corner to carry flat normals and uvs
+        :return: dict, list of arrays of the single buffer
+    """
+    normals = face_normals(mesh)
+    tris, face = triangulate(mesh, normals)
+
+    # z up to y up
+    v = mesh.verts[mesh.loops]
+    co = np.empty(v.shape, dtype='<f4')
+    co[:, 0], co[:, 1], co[:, 2] = v[:, 0], v[:, 2], -v[:, 1]
+    no = np.empty(normals.shape, dtype='<f4')
+    no[:, 0], no[:, 1], no[:, 2] = normals[:, 0], normals[:, 2], -normals[:, 1]
+    arrays = [co, np.repeat(no, mesh.totals, axis=0)]
+    if mesh.uvs is not None:
+        uv = mesh.uvs.astype('<f4')
+        uv[:, 1] = 1 - uv[:, 1]
+        arrays.append(uv)
+
+    matids = mesh.matids[face]
+    used = np.unique(matids).tolist()
+    for m in used:
+        arrays.append(tris[matids == m].astype('<u4').ravel())
+
+    # buffer views of 4 bytes aligned arrays
+    views, accessors, offset = [], [], 0
+    for i, a in enumerate(arrays):
+        views.append({'buffer': 0, 'byteOffset': offset, 'byteLength': a.nbytes})
+        if i < len(arrays) - len(used):
+            views[-1]['target'] = 34962  # ARRAY_BUFFER
+            accessor = {'bufferView': i, 'componentType': 5126, 'count': len(a),
+                        'type': 'VEC{}'.format(a.shape[1])}
+            if i == 0 and len(a) > 0:
+                accessor['min'] = [float(a[:, c].min()) for c in range(3)]
+                accessor['max'] = [float(a[:, c].max()) for c in range(3)]
+        else:
+            views[-1]['target'] = 34963  # ELEMENT_ARRAY_BUFFER
+            accessor = {'bufferView': i, 'componentType': 5125, 'count': len(a), 'type': 'SCALAR'}
+        accessors.append(accessor)
+        offset += a.nbytes
+
+    attributes = {'POSITION': 0, 'NORMAL': 1}
+    if mesh.uvs is not None:
+        attributes['TEXCOORD_0'] = 2
+    first = len(arrays) - len(used)
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'archipack floor'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'mesh': 0, 'name': 'floor'}],
+        'meshes': [{'name': 'floor', 'primitives': [
+            {'attributes': attributes, 'indices': first + k, 'material': k} for k in range(len(used))]}],
+        'materials': [{'name': materials[m], 'pbrMetallicRoughness': {
+            'baseColorFactor': list(COLORS[m % len(COLORS)]), 'metallicFactor': 0, 'roughnessFactor': 0.8}}
+            for m in used],
+        'accessors': accessors,
+        'bufferViews': views,
+        'buffers': [{'byteLength': offset}]
+        }
+    return gltf, arrays
+
+
+def write_glb(path, mesh, materials=MATERIALS):
+    """
+        Binary glTF, json and buffer in a single file
+    """
+    gltf, arrays = _gltf(mesh, materials)
+    offset = gltf['buffers'][0]['byteLength']
+    text = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    text += b' ' * (-len(text) % 4)
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<4sII', b'glTF', 2, 12 + 8 + len(text) + 8 + offset))
+        f.write(struct.pack('<I4s', len(text), b'JSON'))
+        f.write(text)
+        f.write(struct.pack('<I4s', offset, b'BIN\0'))
+        for a in arrays:
+            a.tofile(f)
+
+
+def write_gltf(path, mesh, materials=MATERIALS):
+    """
+        glTF json with its buffer in a .bin next to it
+    """
+    gltf, arrays = _gltf(mesh, materials)
+    bin_path = os.path.splitext(path)[0] + '.bin'
+    gltf['buffers'][0]['uri'] = os.path.basename(bin_path)
+    with open(bin_path, 'wb') as f:
+        for a in arrays:
+            a.tofile(f)
+    with open(path, 'w') as f:
+        json.dump(gltf, f, separators=(',', ':'))
+
+
+def write_npz(path, mesh):
+    """
+        Geometry arrays as they are, to load back without generating the floor again
+    """
+    arrays = {name: getattr(mesh, name) for name in ('verts', 'loops', 'totals', 'matids')}
+    if mesh.uvs is not None:
+        arrays['uvs'] = mesh.uvs
+    np.savez(path, **arrays)
+
+
+def read_npz(path):
+    """
+        MeshData of a file written by write_npz
+    """
+    with np.load(path) as f:
+        return MeshData(f['verts'], f['loops'], f['totals'], f['matids'], f['uvs'] if 'uvs' in f else None)
+
+
+WRITERS = {'.ply': write_ply, '.obj': write_obj, '.glb': write_glb, '.gltf': write_gltf, '.npz': write_npz}
+
+
+def save(path, mesh):
+    """
+        Write mesh to path, format from the extension: .ply, .obj, .glb, .gltf or .npz
+        :param mesh: MeshData, or Instances expanded to a mesh
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in WRITERS:
+        raise ValueError("Unsupported mesh format {}, use one of {}".format(ext, ", ".join(sorted(WRITERS))))
+    if hasattr(mesh, 'to_mesh'):
+        mesh = mesh.to_mesh()
+    WRITERS[ext](path, mesh)
@@ -0,0 +1,64 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Whole floor generation, entry point of the core
+# ----------------------------------------------------------
+from .patterns import generate
+from .prism import floor_mesh
+from .instance import instances
+from .timing import StageTimer
+
+
+def build(d, layout=None, rng=None, timer=None, outline=None, instanced=False):
+    """
+        Tiles and mesh of a floor
+            tiles, mesh = build(FloorParams(pattern='windmill'))
+        :param d: FloorParams or any object exposing the same attributes
+        :param layout: Layout of previous generation of this floor, to only update border tiles and prisms
+        :param rng: Streams, default to the streams of d.seed
+        :param timer: StageTimer recording 'pattern' and 'mesh' stages
+        :param outline: Outline of the floor, default to the d.width x d.length rectangle
+        :param instanced: return Instances instead of MeshData
+        :return: TileSet, MeshData or Instances
+    """
+    if timer is None:
+        timer = StageTimer()
+    with timer.stage('pattern') as s:
+        if outline is not None:
+            tiles = outline.fill(d, rng)
+        elif layout is not None:
+            tiles = layout.generate(d, rng)
+        else:
+            tiles = generate(d, rng)
+        s.verts, s.faces = int(tiles.counts.sum()), len(tiles)
+    with timer.stage('mesh') as s:
+        if instanced:
+            mesh = instances(d, tiles, rng, outline)
+            s.verts, s.faces = mesh.sizes
+        elif layout is not None and outline is None:
+            mesh = layout.mesh(d, rng)
+            s.verts, s.faces = len(mesh.verts), len(mesh.totals)
+        else:
+            mesh = floor_mesh(d, tiles, rng, outline)
+            s.verts, s.faces = len(mesh.verts), len(mesh.totals)
+    return tiles, mesh
@@ -0,0 +1,200 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Tile outlines as numpy arrays, no blender dependency
+# ----------------------------------------------------------
+import numpy as np
+
+
+class TileSet():
+    """
+        A batch of 2d tile outlines stored as padded polygons
+        pts: (n, k, 2) float array of ccw points, polygons with less than k points
+             repeat their last point up to k, so bounds and edges work on the whole array
+        counts: (n,) int array, number of points really used by each polygon
+        ids: (n,) uint64 array, optional key of every tile, kept while clipping,
+             patterns set it so random values of a tile do not depend on its position in arrays
+    """
+    def __init__(self, pts=None, counts=None, ids=None):
+        if pts is None:
+            pts = np.zeros((0, 4, 2))
+        self.pts = np.asarray(pts, dtype=np.float64)
+        if counts is None:
+            counts = np.full(len(self.pts), self.pts.shape[1], dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.pts)
+
+    @staticmethod
+    def concatenate(tilesets):
+        """
+            merge many TileSet into one, padding to the largest polygon size
+        """
+        has_ids = all(t.ids is not None for t in tilesets)
+        tilesets = [t for t in tilesets if len(t) > 0]
+        if len(tilesets) == 0:
+            return TileSet(ids=np.zeros(0, dtype=np.uint64) if has_ids else None)
+        k = max(t.pts.shape[1] for t in tilesets)
+        pts = np.concatenate([pad(t.pts, k) for t in tilesets])
+        counts = np.concatenate([t.counts for t in tilesets])
+        ids = None
+        if has_ids:
+            ids = np.concatenate([t.ids for t in tilesets])
+        return TileSet(pts, counts, ids)
+
+    def select(self, mask):
+        return TileSet(self.pts[mask], self.counts[mask], None if self.ids is None else self.ids[mask])
+
+    def bounds(self):
+        """
+            (n, 4) array of xmin, ymin, xmax, ymax
+        """
+        return np.concatenate((self.pts.min(axis=1), self.pts.max(axis=1)), axis=1)
+
+    def area(self):
+        """
+            (n,) array of polygon areas, padding points add nothing
+        """
+        x, y = self.pts[..., 0], self.pts[..., 1]
+        return 0.5 * (x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y).sum(axis=1)
+
+    @staticmethod
+    def from_mesh(verts, loops, totals):
+        """
+            TileSet from flat faces built by to_mesh (clockwise faces)
+        """
+        if len(totals) == 0:
+            return TileSet()
+        k = int(totals.max())
+        starts = np.cumsum(totals) - totals
+        idx = starts[:, None] + np.maximum(totals[:, None] - 1 - np.arange(k), 0)
+        return TileSet(np.asarray(verts)[loops[idx], 0:2], totals)
+
+    def to_mesh(self, z=0):
+        """
+            Flat mesh arrays, one face per tile, same layout add_plane used to produce
+            faces are ordered clockwise (normal pointing down) so solidify goes upward
+            :return: verts (v, 3) float, loops (l,) int, totals (f,) int
+        """
+        n, k = self.pts.shape[:2]
+        valid = np.arange(k) < self.counts[:, None]
+        verts = np.empty((int(self.counts.sum()), 3))
+        verts[:, 0:2] = self.pts[valid]
+        verts[:, 2] = z
+        starts = np.cumsum(self.counts) - self.counts
+        loops = starts[:, None] + self.counts[:, None] - 1 - np.arange(k)
+        return verts, loops[valid], self.counts.copy()
+
+
+class MeshData():
+    """
+        Flat mesh arrays
+        verts: (v, 3) float coords
+        loops: (l,) int, vertex index of every face corner
+        totals: (f,) int, number of corners of every face
+        matids: (f,) int, material index of every face
+        uvs: (l, 2) float, uv of every face corner, or None
+        normals: (f, 3) float, unit normal of every face when known, or None
+        convex: (f,) bool, convex faces when known, or None
+    """
+    def __init__(self, verts, loops, totals, matids=None, uvs=None, normals=None, convex=None):
+        self.verts = verts
+        self.loops = loops
+        self.totals = totals
+        if matids is None:
+            matids = np.zeros(len(totals), dtype=np.int64)
+        self.matids = matids
+        self.uvs = uvs
+        self.normals = normals
+        self.convex = convex
+
+    @property
+    def starts(self):
+        return np.cumsum(self.totals) - self.totals
+
+    @staticmethod
+    def concatenate(meshes):
+        offsets = np.cumsum([0] + [len(m.verts) for m in meshes[:-1]])
+
+        def optional(name):
+            arrays = [getattr(m, name) for m in meshes]
+            return None if any(a is None for a in arrays) else np.concatenate(arrays)
+
+        return MeshData(
+            np.concatenate([m.verts for m in meshes]),
+            np.concatenate([m.loops + o for m, o in zip(meshes, offsets)]),
+            np.concatenate([m.totals for m in meshes]),
+            np.concatenate([m.matids for m in meshes]),
+            optional('uvs'), optional('normals'), optional('convex')
+            )
+
+
+def pad(pts, k):
+    """
+        pad (n, j, 2) polygons to (n, k, 2) repeating the last point
+    """
+    j = pts.shape[1]
+    if j >= k:
+        return pts
+    return np.concatenate((pts, np.repeat(pts[:, -1:], k - j, axis=1)), axis=1)
+
+
+def rects(x, y, w, l):
+    """
+        TileSet of axis aligned rectangles
+        :param x: start x positions
+        :param y: start y positions
+        :param w: widths (in x direction)
+        :param l: lengths (in y direction)
+    """
+    x, y, w, l = np.broadcast_arrays(*[np.asarray(a, dtype=np.float64) for a in (x, y, w, l)])
+    pts = np.empty(x.shape + (4, 2))
+    pts[..., 0, 0] = x
+    pts[..., 0, 1] = y
+    pts[..., 1, 0] = x + w
+    pts[..., 1, 1] = y
+    pts[..., 2, 0] = x + w
+    pts[..., 2, 1] = y + l
+    pts[..., 3, 0] = x
+    pts[..., 3, 1] = y + l
+    return TileSet(pts.reshape(-1, 4, 2))
+
+
+def mesh_to_lists(verts, loops, totals):
+    """
+        Convert flat mesh arrays to python lists of vertices and faces
+    """
+    starts = np.cumsum(totals) - totals
+    loops = loops.tolist()
+    return verts.tolist(), [loops[s:s + t] for s, t in zip(starts.tolist(), totals.tolist())]
+
+
+def mesh_from_lists(verts, faces):
+    """
+        Convert python lists of vertices and faces to flat mesh arrays
+    """
+    totals = np.fromiter((len(f) for f in faces), dtype=np.int64, count=len(faces))
+    loops = np.fromiter((i for f in faces for i in f), dtype=np.int64, count=int(totals.sum()))
+    return np.asarray(verts, dtype=np.float64).reshape(-1, 3), loops, totals
@@ -0,0 +1,206 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Instanced output
+# Tiles of the same shape, up to a rotation, share one prototype mesh
+# placed by a transform per instance, one-off tiles stay in a plain mesh
+# ----------------------------------------------------------
+import numpy as np
+from .geometry import TileSet, MeshData
+from .prism import tile_thickness, uv_factor, prisms, floor_mesh
+
+TOLERANCE = 1e-5  # tiles are the same shape when their points match within it
+
+
+def _unique_rows(rows):
+    """
+        label of every row of an int (n, m) array, equal rows share their label
+    """
+    rows = np.ascontiguousarray(rows)
+    void = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+    return np.unique(void, return_inverse=True)[1]
+
+
+def canonical(tiles, tolerance=TOLERANCE, keys=None):
+    """
+        Shape of every tile up to a translation and a rotation,
+        tile i = rotation(angle[i]) * points[i] + location[i]
+        :param keys: (n, j) int extra keys telling shapes apart, eg: quantized thickness
+        :return: (n,) shape label, (n, 2) location, (n,) angle, (n, k, 2) points
+    """
+    n, k = tiles.pts.shape[:2]
+    label = np.zeros(n, dtype=np.int64)
+    location = np.zeros((n, 2))
+    angle = np.zeros(n)
+    points = tiles.pts.copy()
+    labels = 0
+    for m in np.unique(tiles.counts).tolist():
+        sel = np.nonzero(tiles.counts == m)[0]
+        p = tiles.pts[sel, :m]
+        c = p.mean(axis=1)
+        q = p - c[:, None, :]
+
+        # every ccw point order, rotated so its first side lies along x,
+        # the lexicographically smallest one is the shape
+        best = best_rows = best_angle = None
+        for j in range(m):
+            r = np.roll(q, -j, axis=1)
+            side = r[:, 1] - r[:, 0]
+            a = np.arctan2(side[:, 1], side[:, 0])
+            cos, sin = np.cos(a)[:, None], np.sin(a)[:, None]
+            r = np.stack((cos * r[..., 0] + sin * r[..., 1], cos * r[..., 1] - sin * r[..., 0]), axis=2)
+            rows = np.round(r.reshape(len(sel), -1) / tolerance).astype(np.int64)
+            if best is None:
+                best, best_rows, best_angle = r, rows, a
+                continue
+            diff = rows != best_rows
+            first = diff.argmax(axis=1)
+            i = np.arange(len(sel))
+            less = diff.any(axis=1) & (rows[i, first] < best_rows[i, first])
+            best[less], best_rows[less], best_angle[less] = r[less], rows[less], a[less]
+
+        if keys is not None:
+            best_rows = np.concatenate((best_rows, keys[sel]), axis=1)
+        inverse = _unique_rows(best_rows)
+        label[sel] = labels + inverse
+        labels += inverse.max() + 1
+        location[sel] = c
+        angle[sel] = best_angle
+        points[sel, :m] = best
+        points[sel, m:] = best[:, -1:]
+    return label, location, angle, points
+
+
+class Instances():
+    """
+        Floor as prototype meshes and their placements
+        shapes: list of MeshData, one prototype per repeated tile shape, around origin
+        shape: (n,) prototype index of every instance
+        location: (n, 2) position of every instance
+        angle: (n,) rotation around z of every instance
+        rest: MeshData of one-off tiles and grout, in floor space
+        uvs of prototypes are planar in their own space, random uv offsets are not applied
+    """
+    def __init__(self, shapes, shape, location, angle, rest):
+        self.shapes = shapes
+        self.shape = shape
+        self.location = location
+        self.angle = angle
+        self.rest = rest
+
+    def __len__(self):
+        return len(self.shape)
+
+    def matrices(self):
+        """
+            (n, 4, 4) transform of every instance
+        """
+        n = len(self)
+        m = np.zeros((n, 4, 4))
+        cos, sin = np.cos(self.angle), np.sin(self.angle)
+        m[:, 0, 0], m[:, 0, 1], m[:, 1, 0], m[:, 1, 1] = cos, -sin, sin, cos
+        m[:, 2, 2] = m[:, 3, 3] = 1
+        m[:, 0:2, 3] = self.location
+        return m
+
+    def to_mesh(self):
+        """
+            MeshData with every instance expanded, eg: to export
+        """
+        meshes = []
+        cos, sin = np.cos(self.angle), np.sin(self.angle)
+        for i, proto in enumerate(self.shapes):
+            sel = np.nonzero(self.shape == i)[0]
+            v = proto.verts
+            verts = np.empty((len(sel), len(v), 3))
+            verts[..., 0] = cos[sel, None] * v[:, 0] - sin[sel, None] * v[:, 1] + self.location[sel, 0:1]
+            verts[..., 1] = sin[sel, None] * v[:, 0] + cos[sel, None] * v[:, 1] + self.location[sel, 1:2]
+            verts[..., 2] = v[:, 2]
+            offsets = (np.arange(len(sel)) * len(v))[:, None]
+            normals = None
+            if proto.normals is not None:
+                n = proto.normals
+                normals = np.empty((len(sel), len(n), 3))
+                normals[..., 0] = cos[sel, None] * n[:, 0] - sin[sel, None] * n[:, 1]
+                normals[..., 1] = sin[sel, None] * n[:, 0] + cos[sel, None] * n[:, 1]
+                normals[..., 2] = n[:, 2]
+                normals = normals.reshape(-1, 3)
+            meshes.append(MeshData(
+                verts.reshape(-1, 3), (proto.loops[None, :] + offsets).ravel(), np.tile(proto.totals, len(sel)),
+                np.tile(proto.matids, len(sel)), None if proto.uvs is None else np.tile(proto.uvs, (len(sel), 1)),
+                normals, None if proto.convex is None else np.tile(proto.convex, len(sel))))
+        return MeshData.concatenate(meshes + [self.rest])
+
+    def emitter(self, i, size=0.001):
+        """
+            Triangles whose center and first side give location and rotation of instances of shape i,
+            as read by face duplication
+            :return: verts (3n, 3), loops (3n,), totals (n,)
+        """
+        sel = np.nonzero(self.shape == i)[0]
+        tri = size * np.array(((-1, -1), (2, -1), (-1, 2)), dtype=np.float64)  # centered
+        cos, sin = np.cos(self.angle[sel])[:, None], np.sin(self.angle[sel])[:, None]
+        verts = np.zeros((len(sel), 3, 3))
+        verts[..., 0] = cos * tri[:, 0] - sin * tri[:, 1] + self.location[sel, 0:1]
+        verts[..., 1] = sin * tri[:, 0] + cos * tri[:, 1] + self.location[sel, 1:2]
+        return verts.reshape(-1, 3), np.arange(3 * len(sel)), np.full(len(sel), 3, dtype=np.int64)
+
+    @property
+    def sizes(self):
+        """
+            total verts and faces of prototypes and rest mesh
+        """
+        meshes = self.shapes + [self.rest]
+        return sum(len(m.verts) for m in meshes), sum(len(m.totals) for m in meshes)
+
+
+def instances(d, tiles, rng=None, outline=None, tolerance=TOLERANCE, min_count=2):
+    """
+        Instances of tiles, shapes found fewer than min_count times go to the rest mesh
+        :param tiles: TileSet of d.pattern
+        :param outline: Outline tiles were clipped to
+        :return: Instances
+    """
+    factor = uv_factor(d, outline)
+    thickness = tile_thickness(d, tiles.ids, rng)
+    keys = np.round(thickness / tolerance).astype(np.int64)[:, None] if d.vary_thickness else None
+    label, location, angle, points = canonical(tiles, tolerance, keys)
+
+    count = np.bincount(label)
+    repeated = count[label] >= min_count
+    # prototypes numbered by first use
+    labels, first = np.unique(label[repeated], return_index=True)
+    first = np.nonzero(repeated)[0][first]
+    order = np.argsort(first)
+    labels, first = labels[order], first[order]
+    index = np.full(len(count), -1, dtype=np.int64)
+    index[labels] = np.arange(len(labels))
+
+    chamfer = d.bevel_amount if d.bevel else 0
+    shapes = []
+    for i in first.tolist():
+        proto = TileSet(points[i:i + 1, :tiles.counts[i]], tiles.counts[i:i + 1])
+        shapes.append(prisms(proto, thickness[i:i + 1], uv_factor=factor, chamfer=chamfer))
+
+    rest = floor_mesh(d, tiles.select(~repeated), rng, outline)
+    return Instances(shapes, index[label[repeated]], location[repeated], angle[repeated], rest)
@@ -0,0 +1,143 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Incremental regeneration of tile layouts
+# ----------------------------------------------------------
+import numpy as np
+from .geometry import MeshData, TileSet
+from .clipping import clip_rect
+from .patterns import MOTIFS, PATTERN_PARAMS, generate
+from .prism import grout, loop_values, merge_prisms, prisms, tile_thickness, uv_factor, uv_offsets
+
+# parameters of the prisms of tiles, besides tiles themselves
+PRISM_PARAMS = ('seed', 'thickness', 'vary_thickness', 'thickness_variance', 'bevel', 'bevel_amount')
+
+
+class Layout():
+    """
+        Tiles and tile prisms of the last generation of a floor
+        When only width and / or length change, tiles whose unclipped outline
+        stay below both the old and new sizes are kept as is, and only
+        the tiles reaching the changed border strips are generated and clipped.
+        mesh() then only builds prisms of those border tiles.
+        Tiles of boards and regular_tile keep their ids and random values too,
+        but are cheap to generate and are regenerated in full with their prisms.
+    """
+    def __init__(self):
+        self.key = None
+        self.width = 0
+        self.length = 0
+        self.tiles = None
+        # (n, 2) xmax, ymax of every tile before clipping
+        self.reach = None
+        # prisms of the last mesh() with uv scale 1 and no uv offsets, their params and tile counts
+        self.prisms = None
+        self.prism_key = None
+        self.counts = None
+        # (n,) tile of self.prisms every tile comes from, kept tiles come first, -1 for new tiles
+        self.origin = None
+
+    @staticmethod
+    def layout_key(d):
+        return tuple(getattr(d, attr) for attr in PATTERN_PARAMS if attr not in ('width', 'length'))
+
+    def generate(self, d, rng=None):
+        """
+            TileSet of d.pattern, clipped to the floor
+        """
+        key = self.layout_key(d)
+        if d.pattern not in MOTIFS:
+            self.key, self.tiles = None, generate(d, rng)
+            self.origin = np.full(len(self.tiles), -1)
+            return self.tiles
+
+        motif = MOTIFS[d.pattern](d)
+        if key != self.key:
+            tiles = motif.tiles(0, 0, d.width, d.length)
+            self.tiles, self.reach = self._clip(d, tiles)
+            self.origin = np.full(len(self.tiles), -1)
+        else:
+            self.tiles, self.reach = self._resize(d, motif)
+
+        self.key, self.width, self.length = key, d.width, d.length
+        return self.tiles
+
+    def mesh(self, d, rng=None):
+        """
+            floor_mesh of the last generated tiles,
+            reusing prisms of the tiles kept since the last call
+        """
+        tiles = self.tiles
+        key = tuple(getattr(d, attr) for attr in PRISM_PARAMS)
+        chamfer = d.bevel_amount if d.bevel else 0
+        reuse = self.prisms is not None and key == self.prism_key and (self.origin >= 0).any()
+        new = tiles.select(self.origin < 0) if reuse else tiles
+        raw = prisms(new, tile_thickness(d, new.ids, rng), chamfer=chamfer)
+        if reuse:
+            keep = np.zeros(len(self.counts), dtype=bool)
+            keep[self.origin[self.origin >= 0]] = True
+            raw, counts = merge_prisms(self.prisms, self.counts, keep, raw, new.counts, chamfered=chamfer > 0)
+        self.prisms, self.prism_key, self.counts = raw, key, tiles.counts
+        self.origin = np.arange(len(tiles))
+
+        factor = uv_factor(d)
+        uvs = raw.uvs * factor
+        if d.random_uvs:
+            uvs += loop_values(uv_offsets(d, tiles.ids, rng), tiles.counts, chamfered=chamfer > 0)
+        mesh = MeshData(raw.verts, raw.loops, raw.totals, raw.matids, uvs, raw.normals, raw.convex)
+        if d.add_grout:
+            block = grout(d, factor)
+            if block is not None:
+                mesh = MeshData.concatenate([mesh, block])
+        return mesh
+
+    @staticmethod
+    def _clip(d, tiles):
+        """
+            clip tiles to the floor, keep track of their unclipped reach
+        """
+        reach = tiles.bounds()[:, 2:4]
+        ids = tiles.ids
+        tiles.ids = np.arange(len(tiles))
+        tiles = clip_rect(tiles, 0, 0, d.width, d.length)
+        index = tiles.ids.astype(np.int64)
+        tiles.ids = ids[index]
+        return tiles, reach[index]
+
+    def _resize(self, d, motif):
+        xs, ys = min(self.width, d.width), min(self.length, d.length)
+
+        # tiles below both old and new sizes are clipped the same way
+        stable = (self.reach[:, 0] <= xs) & (self.reach[:, 1] <= ys)
+
+        # every tile reaching past xs, then every other tile reaching past ys
+        right = motif.tiles(xs, 0, d.width, d.length)
+        right = right.select(right.bounds()[:, 2] > xs)
+        top = motif.tiles(0, ys, d.width, d.length)
+        b = top.bounds()
+        top = top.select((b[:, 3] > ys) & (b[:, 2] <= xs))
+        tiles, reach = self._clip(d, TileSet.concatenate([right, top]))
+
+        self.origin = np.concatenate((self.origin[stable], np.full(len(tiles), -1)))
+        return (TileSet.concatenate([self.tiles.select(stable), tiles]),
+                np.concatenate((self.reach[stable], reach)))
@@ -0,0 +1,88 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Unit cell tiling engine
+# ----------------------------------------------------------
+import numpy as np
+from .geometry import TileSet
+from .clipping import clip_rect
+from .rng import hash_keys
+
+
+class Motif():
+    """
+        A periodic pattern declared as a unit cell
+        cell: TileSet, tiles of one cell relative to the cell origin
+        a, b: lattice translation vectors, cell (i, j) is at origin + i * a + j * b
+        origin: position of cell (0, 0) on the floor
+        Tile k of cell (i, j) gets id hash_keys(i, j, k), stable when the floor grows
+    """
+    def __init__(self, cell, a, b, origin=(0, 0)):
+        self.cell = cell
+        self.a = np.asarray(a, dtype=np.float64)
+        self.b = np.asarray(b, dtype=np.float64)
+        self.origin = np.asarray(origin, dtype=np.float64)
+
+    def lattice(self, xmin, ymin, xmax, ymax):
+        """
+            (n, 2) translations of every cell overlapping the window, (n, 2) int lattice coords i, j
+        """
+        cb = self.cell.bounds()
+        cx0, cy0 = cb[:, 0:2].min(axis=0)
+        cx1, cy1 = cb[:, 2:4].max(axis=0)
+        # range of cell translations whose bounds overlap the window
+        tx0, ty0, tx1, ty1 = xmin - cx1, ymin - cy1, xmax - cx0, ymax - cy0
+        corners = np.array([(tx0, ty0), (tx1, ty0), (tx1, ty1), (tx0, ty1)]) - self.origin
+        ij = np.linalg.solve(np.stack((self.a, self.b), axis=1), corners.T)
+        i0, j0 = np.floor(ij.min(axis=1)).astype(np.int64)
+        i1, j1 = np.ceil(ij.max(axis=1)).astype(np.int64)
+        i, j = np.meshgrid(np.arange(i0, i1 + 1), np.arange(j0, j1 + 1))
+        ij = np.stack((i.ravel(), j.ravel()), axis=1)
+        t = self.origin + ij[:, 0:1] * self.a + ij[:, 1:2] * self.b
+        keep = (t[:, 0] > tx0) & (t[:, 0] < tx1) & (t[:, 1] > ty0) & (t[:, 1] < ty1)
+        return t[keep], ij[keep]
+
+    def tiles(self, xmin, ymin, xmax, ymax):
+        """
+            TileSet of every unclipped tile overlapping the window
+        """
+        t, ij = self.lattice(xmin, ymin, xmax, ymax)
+        m, k = self.cell.pts.shape[:2]
+        pts = (self.cell.pts[None, :, :, :] + t[:, None, None, :]).reshape(-1, k, 2)
+        ids = hash_keys(ij[:, 0:1], ij[:, 1:2], np.arange(m)[None, :]).ravel()
+        tiles = TileSet(pts, np.tile(self.cell.counts, len(t)), ids)
+        b = tiles.bounds()
+        return tiles.select((b[:, 0] < xmax) & (b[:, 1] < ymax) & (b[:, 2] > xmin) & (b[:, 3] > ymin))
+
+    def fill(self, xmin, ymin, xmax, ymax):
+        """
+            TileSet covering the window, border tiles clipped to it
+        """
+        return clip_rect(self.tiles(xmin, ymin, xmax, ymax), xmin, ymin, xmax, ymax)
+
+
+def cell(*tilesets):
+    """
+        TileSet of a unit cell from TileSet parts
+    """
+    return TileSet.concatenate(tilesets)
@@ -0,0 +1,499 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Arbitrary floor boundary with holes
+# A uniform grid tells tiles fully inside or outside the boundary apart,
+# only tiles touching it are clipped, one at a time
+# ----------------------------------------------------------
+import hashlib
+import numpy as np
+from .geometry import TileSet, rects, pad
+from .clipping import clip_halfplane, AREA_EPSILON
+from .params import FloorParams
+from .patterns import generate
+
+OUTSIDE, INSIDE, BORDER = 0, 1, 2
+
+EPSILON = 1e-9  # distance under which points lie on a line
+WELD = 1e-7  # distance under which chained segment ends are the same point
+
+
+def ring_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * (x * np.roll(y, -1) - np.roll(x, -1) * y).sum()
+
+
+def rings_from_edges(verts, edges):
+    """
+        Closed rings from unordered edges, eg: boundary edges of mesh faces
+        :param verts: (v, 2+) coords
+        :param edges: (e, 2) vertex indexes
+        :return: list of (m, 2) arrays, open chains are dropped
+    """
+    verts = np.asarray(verts, dtype=np.float64)[:, 0:2]
+    links = {}
+    for a, b in np.asarray(edges, dtype=np.int64).tolist():
+        links.setdefault(a, []).append(b)
+        links.setdefault(b, []).append(a)
+    rings = []
+    used = set()
+    for first in links:
+        if first in used:
+            continue
+        ring, prev, cur = [first], None, first
+        used.add(first)
+        while True:
+            nxt = [v for v in links[cur] if v != prev and (v not in used or v == first)]
+            if len(nxt) == 0:
+                break
+            prev, cur = cur, nxt[0]
+            if cur == first:
+                if len(ring) > 2:
+                    rings.append(verts[ring])
+                break
+            ring.append(cur)
+            used.add(cur)
+    return rings
+
+
+def _contains(edges, pts):
+    """
+        Even-odd point in polygon test of pts (n, 2) against edges (e, 2, 2)
+    """
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    inside = np.zeros(len(pts), dtype=bool)
+    a, b = edges[:, 0], edges[:, 1]
+    # by chunks of points to bound memory
+    for s in range(0, len(pts), 4096):
+        p = pts[s:s + 4096, None, :]
+        ay, by = a[None, :, 1], b[None, :, 1]
+        crosses = (ay > p[..., 1]) != (by > p[..., 1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = a[None, :, 0] + (p[..., 1] - ay) * (b[None, :, 0] - a[None, :, 0]) / (by - ay)
+        inside[s:s + 4096] = ((crosses & (p[..., 0] < x)).sum(axis=1) % 2) == 1
+    return inside
+
+
+class Outline():
+    """
+        Floor boundary as closed rings under the even-odd rule:
+        rings bound the floor, rings inside them are holes, rings inside holes are islands...
+            outline = Outline([room, column])
+            tiles = outline.fill(d)
+        rings are oriented, ccw around the floor and cw around holes,
+        so the floor is always on the left of edges
+    """
+    def __init__(self, rings, resolution=None):
+        rings = [np.asarray(r, dtype=np.float64)[:, 0:2] for r in rings]
+        rings = [r[:-1] if len(r) > 3 and np.allclose(r[0], r[-1]) else r for r in rings]
+        rings = [r for r in rings if len(r) > 2 and abs(ring_area(r)) > AREA_EPSILON]
+        if len(rings) == 0:
+            raise ValueError("Outline needs at least one closed ring with area")
+
+        # orient by nesting depth
+        edges = [np.stack((r, np.roll(r, -1, axis=0)), axis=1) for r in rings]
+        for i, r in enumerate(rings):
+            others = [e for j, e in enumerate(edges) if j != i]
+            depth = 0 if len(others) == 0 else int(_contains(np.concatenate(others), r[0:1])[0])
+            if (ring_area(r) > 0) == (depth == 1):
+                rings[i] = r[::-1]
+        self.rings = rings
+        self.edges = np.concatenate([np.stack((r, np.roll(r, -1, axis=0)), axis=1) for r in rings])
+
+        pts = np.concatenate(rings)
+        self.bounds = np.concatenate((pts.min(axis=0), pts.max(axis=0)))
+        self._build_grid(resolution)
+
+    @staticmethod
+    def from_edges(verts, edges):
+        return Outline(rings_from_edges(verts, edges))
+
+    @property
+    def key(self):
+        """
+            Digest of the boundary, for cache keys
+        """
+        return hashlib.sha1(self.edges.tobytes()).hexdigest()
+
+    def contains(self, pts):
+        return _contains(self.edges, pts)
+
+    # spatial index
+
+    def _build_grid(self, resolution):
+        x0, y0, x1, y1 = self.bounds
+        if resolution is None:
+            resolution = int(np.clip(8 * np.sqrt(len(self.edges)), 64, 256))
+        self.nx = self.ny = resolution
+        self.cell = np.array(((x1 - x0) / self.nx, (y1 - y0) / self.ny))
+
+        # cells crossed by every edge, sampled at half a cell, with the
+        # cells between consecutive samples so diagonal steps miss nothing
+        a, b = self.edges[:, 0], self.edges[:, 1]
+        steps = np.ceil(np.abs((b - a) / self.cell).max(axis=1) * 2).astype(np.int64) + 1
+        edge = np.repeat(np.arange(len(self.edges)), steps + 1)
+        t = np.concatenate([np.linspace(0, 1, s + 1) for s in steps])
+        c = self._cells(a[edge] + t[:, None] * (b - a)[edge])
+        same = np.concatenate((edge[1:] == edge[:-1], [False]))
+        lo = np.minimum(c[:-1], c[1:])[same[:-1]]
+        hi = np.maximum(c[:-1], c[1:])[same[:-1]]
+        cx, cy, ce = [c[:, 0]], [c[:, 1]], [edge]
+        e = edge[:-1][same[:-1]]
+        for dx, dy in ((0, 1), (1, 0), (1, 1)):
+            cx.append(np.minimum(lo[:, 0] + dx, hi[:, 0]))
+            cy.append(np.minimum(lo[:, 1] + dy, hi[:, 1]))
+            ce.append(e)
+        # unique (cell, edge) pairs, sorted by cell
+        ne = len(self.edges)
+        keys = np.unique((np.concatenate(cx) * self.ny + np.concatenate(cy)) * ne + np.concatenate(ce))
+        cells, edge = keys // ne, keys % ne
+
+        self.state = np.full((self.nx, self.ny), OUTSIDE, dtype=np.int8)
+        self.state[cells // self.ny, cells % self.ny] = BORDER
+        ix, iy = np.nonzero(self.state != BORDER)
+        centers = np.stack((x0 + (ix + 0.5) * self.cell[0], y0 + (iy + 0.5) * self.cell[1]), axis=1)
+        inside = self.contains(centers)
+        self.state[ix[inside], iy[inside]] = INSIDE
+
+        # edges of every border cell, cells in sorted order with the start of their edges
+        self._cells_key, self._cells_start = np.unique(cells, return_index=True)
+        self._cells_stop = np.append(self._cells_start[1:], len(cells))
+        self._cells_edge = edge
+
+        # summed area tables to count inside / outside cells of any range
+        def table(mask):
+            t = np.zeros((self.nx + 1, self.ny + 1), dtype=np.int64)
+            t[1:, 1:] = mask.cumsum(axis=0).cumsum(axis=1)
+            return t
+        self._inside = table(self.state == INSIDE)
+        self._outside = table(self.state == OUTSIDE)
+
+    def _cells(self, pts):
+        c = np.floor((pts - self.bounds[0:2]) / self.cell).astype(np.int64)
+        return np.stack((np.clip(c[:, 0], 0, self.nx - 1), np.clip(c[:, 1], 0, self.ny - 1)), axis=1)
+
+    def _ranges(self, tiles):
+        """
+            cell ranges covered by tile bounds, unclamped and clamped to the grid
+        """
+        b = tiles.bounds()
+        lo = np.floor((b[:, 0:2] - self.bounds[0:2]) / self.cell).astype(np.int64)
+        hi = np.floor((b[:, 2:4] - self.bounds[0:2]) / self.cell).astype(np.int64)
+        size = np.array((self.nx, self.ny))
+        clo, chi = np.clip(lo, 0, size - 1), np.clip(hi, 0, size - 1)
+        return lo, hi, clo, chi
+
+    def classify(self, tiles):
+        """
+            (n,) OUTSIDE, INSIDE or BORDER state of every tile
+        """
+        lo, hi, clo, chi = self._ranges(tiles)
+        total = np.prod(hi - lo + 1, axis=1)
+        clamped = np.prod(np.maximum(chi - clo + 1, 0), axis=1)
+        empty = (hi < 0).any(axis=1) | (lo >= np.array((self.nx, self.ny))).any(axis=1)
+
+        def count(t):
+            return (t[chi[:, 0] + 1, chi[:, 1] + 1] - t[clo[:, 0], chi[:, 1] + 1] -
+                    t[chi[:, 0] + 1, clo[:, 1]] + t[clo[:, 0], clo[:, 1]])
+
+        inside = count(self._inside)
+        outside = count(self._outside) + total - clamped
+        state = np.full(len(tiles), BORDER, dtype=np.int8)
+        state[(inside == total) & ~empty] = INSIDE
+        state[(outside == total) | empty] = OUTSIDE
+        return state
+
+    def _pairs(self, tiles):
+        """
+            (tile, edge) pairs of tiles and edges sharing a grid cell,
+            unique and sorted by tile
+        """
+        lo, hi, clo, chi = self._ranges(tiles)
+        size = chi - clo + 1
+        cells = size.prod(axis=1)
+        tile = np.repeat(np.arange(len(tiles)), cells)
+        offset = np.arange(len(tile)) - np.repeat(np.cumsum(cells) - cells, cells)
+        key = (clo[tile, 0] + offset // size[tile, 1]) * self.ny + clo[tile, 1] + offset % size[tile, 1]
+        slot = np.minimum(np.searchsorted(self._cells_key, key), len(self._cells_key) - 1)
+        found = self._cells_key[slot] == key
+        tile, slot = tile[found], slot[found]
+        count = self._cells_stop[slot] - self._cells_start[slot]
+        start = np.repeat(self._cells_start[slot] - (np.cumsum(count) - count), count)
+        edge = self._cells_edge[start + np.arange(count.sum())]
+        ne = len(self.edges)
+        keys = np.unique(np.repeat(tile, count) * ne + edge)
+        return keys // ne, keys % ne
+
+    def _touching(self, tiles, tile, edge):
+        """
+            (p,) True for pairs whose edge touches the tile, tiles are convex
+        """
+        pts = tiles.pts[tile]
+        d = np.roll(pts, -1, axis=1) - pts
+        n = np.stack((-d[..., 1], d[..., 0]), axis=2)
+        n /= np.maximum(np.linalg.norm(n, axis=2, keepdims=True), 1e-300)
+        c = (n * pts).sum(axis=2)
+        a, b = self.edges[edge, 0], self.edges[edge, 1]
+        # padding points give null normals, always satisfied
+        da = (n * a[:, None, :]).sum(axis=2) - c + EPSILON
+        db = (n * b[:, None, :]).sum(axis=2) - c + EPSILON
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = da / (da - db)
+        t0 = np.maximum(0, np.where(da < db, t, -np.inf).max(axis=1))
+        t1 = np.minimum(1, np.where(da > db, t, np.inf).min(axis=1))
+        out = ((da < 0) & (db < 0)).any(axis=1)
+        return ~out & (t0 <= t1)
+
+    # clipping
+
+    def clip(self, tiles):
+        """
+            TileSet of tiles clipped to the boundary, inside tiles are copied through,
+            border tiles may give several pieces sharing their id
+        """
+        state = self.classify(tiles)
+        inside = tiles.select(state == INSIDE)
+        border = np.nonzero(state == BORDER)[0]
+        if len(border) == 0:
+            return inside
+
+        border = tiles.select(border)
+        tile, edge = self._pairs(border)
+        touching = self._touching(border, tile, edge)
+        tile, edge = tile[touching], edge[touching]
+        start = np.searchsorted(tile, np.arange(len(border) + 1))
+        crossed = start[1:] > start[:-1]
+
+        # border tiles no edge touches are either inside or outside, as their centroid
+        whole = border.select(~crossed)
+        valid = np.arange(whole.pts.shape[1])[None, :] < whole.counts[:, None]
+        centroids = (whole.pts * valid[..., None]).sum(axis=1) / whole.counts[:, None]
+        inside = TileSet.concatenate([inside, whole.select(self.contains(centroids))])
+
+        pieces, ids = [], []
+        for i in np.nonzero(crossed)[0].tolist():
+            edges = self.edges[edge[start[i]:start[i + 1]]]
+            for piece in clip_convex_region(border.pts[i, :border.counts[i]], edges, self.contains):
+                pieces.append(piece)
+                if border.ids is not None:
+                    ids.append(border.ids[i])
+
+        if len(pieces) == 0:
+            return inside
+        k = max(len(p) for p in pieces)
+        pts = np.stack([pad(p[None], k)[0] for p in pieces])
+        ids = None if border.ids is None else np.array(ids, dtype=np.uint64)
+        clipped = TileSet(pts, [len(p) for p in pieces], ids)
+        return TileSet.concatenate([inside, clipped])
+
+    def params(self, d):
+        """
+            FloorParams of d sized to the bounds of the boundary
+        """
+        x0, y0, x1, y1 = self.bounds
+        return FloorParams.from_object(d).copy(width=x1 - x0, length=y1 - y0)
+
+    def fill(self, d, rng=None):
+        """
+            TileSet of d.pattern starting at the lower left corner of the boundary, clipped to it
+        """
+        tiles = generate(self.params(d), rng)
+        tiles.pts += self.bounds[0:2]
+        return self.clip(tiles)
+
+    def area_tiles(self):
+        """
+            TileSet covering the whole floor area, eg: grout
+        """
+        x0, y0, x1, y1 = self.bounds
+        return self.clip(rects(x0, y0, x1 - x0, y1 - y0))
+
+
+def _inward_planes(tile):
+    """
+        inward normals and offsets of a ccw convex polygon, inside when n.p >= c
+    """
+    d = np.roll(tile, -1, axis=0) - tile
+    n = np.stack((-d[:, 1], d[:, 0]), axis=1)
+    n /= np.maximum(np.linalg.norm(n, axis=1, keepdims=True), 1e-300)
+    return n, (n * tile).sum(axis=1)
+
+
+def _clip_params(n, c, edges, margin=0):
+    """
+        Cyrus-Beck parameters of edges (e, 2, 2) against a convex polygon given by
+        inward planes, grown by margin
+        :return: t0, t1 (e,) parameters of the part inside, out (e,) edges fully outside a plane
+    """
+    a, b = edges[:, 0], edges[:, 1]
+    da = a @ n.T - c + margin
+    db = b @ n.T - c + margin
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = da / (da - db)
+    t0 = np.maximum(0, np.where(da < db, t, -np.inf).max(axis=1))
+    t1 = np.minimum(1, np.where(da > db, t, np.inf).min(axis=1))
+    out = ((da < -EPSILON) & (db < -EPSILON)).any(axis=1)
+    return t0, t1, out, da - margin, db - margin
+
+
+def _segments(tile, edges, contains):
+    """
+        Oriented boundary segments of tile & region
+        :param tile: (m, 2) ccw convex polygon
+        :param edges: (e, 2, 2) region edges near the tile, region on their left
+    """
+    n, c = _inward_planes(tile)
+    segments = []
+    a, b = edges[:, 0], edges[:, 1]
+    e = b - a
+
+    # region edges inside the tile, except those lying on tile sides
+    if len(edges) > 0:
+        t0, t1, out, da, db = _clip_params(n, c, edges)
+        on_side = ((np.abs(da) < EPSILON) & (np.abs(db) < EPSILON)).any(axis=1)
+        length = np.linalg.norm(e, axis=1)
+        keep = ~on_side & ~out & ((t1 - t0) * length > EPSILON)
+        p = a[keep] + t0[keep, None] * e[keep]
+        q = a[keep] + t1[keep, None] * e[keep]
+        segments.extend(zip(p, q))
+
+    # tile sides inside the region, split where region edges cross them
+    # and at region vertices lying on them, ends of collinear overlaps
+    d = np.roll(tile, -1, axis=0) - tile
+    length = np.linalg.norm(d, axis=1)
+    splits = [np.array((0.0, 1.0))] * len(tile)
+    if len(edges) > 0:
+        w = a[None, :, :] - tile[:, None, :]
+        den = d[:, None, 0] * e[None, :, 1] - d[:, None, 1] * e[None, :, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ts = (w[..., 0] * e[None, :, 1] - w[..., 1] * e[None, :, 0]) / den
+            te = (w[..., 0] * d[:, None, 1] - w[..., 1] * d[:, None, 0]) / den
+        hit = (np.abs(den) > 1e-300) & (te >= -1e-12) & (te <= 1 + 1e-12) & (ts > 0) & (ts < 1)
+        u = d / np.maximum(length, 1e-300)[:, None]
+        found = [np.where(hit, ts, np.nan)]
+        for v in (a, b):
+            rel = v[None, :, :] - tile[:, None, :]
+            dist = np.abs(rel[..., 1] * u[:, None, 0] - rel[..., 0] * u[:, None, 1])
+            tv = (rel * u[:, None, :]).sum(axis=2) / np.maximum(length, 1e-300)[:, None]
+            found.append(np.where((dist < EPSILON) & (tv > 0) & (tv < 1), tv, np.nan))
+        found = np.concatenate(found, axis=1)
+        for i in range(len(tile)):
+            s = found[i][~np.isnan(found[i])]
+            if len(s) > 0:
+                s = np.unique(np.concatenate(((0.0, 1.0), s)))
+                s = s[np.concatenate(([True], np.diff(s) * length[i] > EPSILON))]
+                s[-1] = 1.0
+                splits[i] = s
+    side = np.concatenate([np.full(len(s) - 1, i) for i, s in enumerate(splits)])
+    s0 = np.concatenate([s[:-1] for s in splits])
+    s1 = np.concatenate([s[1:] for s in splits])
+    valid = length[side] > EPSILON
+    side, s0, s1 = side[valid], s0[valid], s1[valid]
+    mid = tile[side] + (0.5 * (s0 + s1))[:, None] * d[side]
+    keep = contains(mid)
+    if len(edges) > 0:
+        # collinear with a region edge: keep when both have the region on the same side
+        el = np.maximum(np.linalg.norm(e, axis=1), 1e-300)
+        rel = mid[:, None, :] - a[None, :, :]
+        dist = np.abs(e[None, :, 0] * rel[..., 1] - e[None, :, 1] * rel[..., 0]) / el
+        te = (rel * e[None, :, :]).sum(axis=2) / el ** 2
+        on = (dist < EPSILON) & (te > 0) & (te < 1)
+        collinear = on.any(axis=1)
+        same = (on & (d[side] @ e.T > 0)).any(axis=1)
+        keep = np.where(collinear, same, keep)
+    p = tile[side] + s0[:, None] * d[side]
+    q = tile[side] + s1[:, None] * d[side]
+    segments.extend(zip(p[keep], q[keep]))
+    return segments
+
+
+def _chain(segments):
+    """
+        Closed loops from oriented segments, matching ends within WELD
+    """
+    if len(segments) == 0:
+        return []
+    starts = np.array([s[0] for s in segments])
+    ends = np.array([s[1] for s in segments])
+    used = np.zeros(len(segments), dtype=bool)
+    loops = []
+    for first in range(len(segments)):
+        if used[first]:
+            continue
+        loop = [first]
+        used[first] = True
+        cur = first
+        while True:
+            dist = np.linalg.norm(starts - ends[cur], axis=1)
+            if dist[first] < WELD and len(loop) > 2:
+                loops.append(starts[loop])
+                break
+            dist[used] = np.inf
+            nxt = int(np.argmin(dist))
+            if dist[nxt] >= WELD:
+                # open chain, numerical failure, drop it
+                break
+            used[nxt] = True
+            loop.append(nxt)
+            cur = nxt
+    return [_simplify(l) for l in loops]
+
+
+def _simplify(loop):
+    """
+        remove points between collinear segments
+    """
+    while len(loop) > 3:
+        prv, nxt = np.roll(loop, 1, axis=0), np.roll(loop, -1, axis=0)
+        d0, d1 = loop - prv, nxt - loop
+        cross = d0[:, 0] * d1[:, 1] - d0[:, 1] * d1[:, 0]
+        straight = (np.abs(cross) <= EPSILON * (np.linalg.norm(d0, axis=1) + np.linalg.norm(d1, axis=1))) & \
+            ((d0 * d1).sum(axis=1) > 0)
+        if not straight.any():
+            break
+        loop = loop[~straight]
+    return loop
+
+
+def clip_convex_region(tile, edges, contains, depth=0):
+    """
+        Pieces of a convex tile inside a region, holes inside the tile are
+        removed by splitting the tile across them
+        :param tile: (m, 2) ccw convex polygon
+        :param edges: (e, 2, 2) region edges near the tile
+        :param contains: even-odd test of the whole region
+        :return: list of (k, 2) ccw polygons
+    """
+    loops = _chain(_segments(tile, edges, contains))
+    holes = [l for l in loops if ring_area(l) < 0]
+    if len(holes) == 0 or depth > 16:
+        return [l for l in loops if ring_area(l) > AREA_EPSILON]
+
+    # cut across the first hole, both halves are convex, the hole now touches their sides
+    x = 0.5 * (holes[0][:, 0].min() + holes[0][:, 0].max())
+    pieces = []
+    for nx, c in ((1, x), (-1, -x)):
+        half = clip_halfplane(TileSet(tile[None]), nx, 0, c)
+        if len(half) > 0:
+            pieces.extend(clip_convex_region(half.pts[0, :half.counts[0]], edges, contains, depth + 1))
+    return pieces
@@ -0,0 +1,173 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Build many floors in a process pool
+# Workers import floor_core as a top level package, so
+# it must be importable without the addon (see core_path)
+# ----------------------------------------------------------
+import os
+import time
+import multiprocessing
+from .floor import build as build_floor
+from .chunks import Chunk
+from .export import save
+
+# directory to add to sys.path so "import floor_core" works
+core_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# pools kept alive between calls, by (processes, executable), see shared_pool
+pools = {}
+
+
+def build(d, outline=None, instanced=False):
+    """
+        Tiles and mesh of one floor
+        :return: number of tiles, MeshData or Instances, seconds
+    """
+    t = time.perf_counter()
+    tiles, mesh = build_floor(d, outline=outline, instanced=instanced)
+    return len(tiles), mesh, time.perf_counter() - t
+
+
+def _build_indexed(job):
+    i, d, outline, instanced = job
+    return (i, ) + build(d, outline, instanced)
+
+
+def pool_size(processes, jobs):
+    """
+        Number of processes really used for jobs, processes None or 0 for one per cpu
+    """
+    return max(1, min(processes or os.cpu_count() or 1, jobs))
+
+
+def _pool(processes, executable=None):
+    ctx = multiprocessing.get_context('spawn')
+    if executable is not None:
+        ctx.set_executable(executable)
+    return ctx.Pool(processes)
+
+
+def shared_pool(processes=None, executable=None):
+    """
+        Pool of spawned processes kept alive across calls, eg: between interactive updates,
+        workers stay until close_pools()
+        :param processes: number of processes, default to cpu count
+    """
+    key = (processes or os.cpu_count() or 1, executable)
+    pool = pools.get(key)
+    if pool is None:
+        pool = pools[key] = _pool(key[0], executable)
+    return pool
+
+
+def close_pools():
+    for pool in pools.values():
+        pool.terminate()
+        pool.join()
+    pools.clear()
+
+
+def _imap(function, jobs, processes=None, executable=None, pool=None):
+    """
+        Results of function over jobs in a pool of spawned processes, as they complete
+        :param pool: a pool to use and leave running, eg: shared_pool(), default to a pool of this call
+    """
+    if len(jobs) == 0:
+        return
+    if pool is not None:
+        for result in pool.imap_unordered(function, jobs):
+            yield result
+        return
+    pool = _pool(pool_size(processes, len(jobs)), executable)
+    try:
+        for result in pool.imap_unordered(function, jobs):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def build_all(params, processes=None, executable=None, outlines=None, instanced=None):
+    """
+        Build floors in a pool of processes, yield results as they complete
+        :param params: list of FloorParams
+        :param processes: number of processes, default to cpu count
+        :param executable: python interpreter of workers, when running embedded
+        :param outlines: list of Outline or None, one per params
+        :param instanced: list of bool, one per params, build Instances instead of MeshData
+        :return: generator of (index in params, number of tiles, MeshData or Instances, seconds)
+    """
+    if outlines is None:
+        outlines = [None] * len(params)
+    if instanced is None:
+        instanced = [False] * len(params)
+    jobs = [(i, ) + job for i, job in enumerate(zip(params, outlines, instanced))]
+    for result in _imap(_build_indexed, jobs, processes, executable):
+        yield result
+
+
+def _save_indexed(job):
+    i, d, outline, path = job
+    try:
+        n, mesh, seconds = build(d, outline)
+        t = time.perf_counter()
+        save(path, mesh)
+        return i, n, len(mesh.totals), seconds, time.perf_counter() - t, None
+    except Exception as e:
+        return i, 0, 0, 0, 0, "{}: {}".format(type(e).__name__, e)
+
+
+def save_all(params, paths, processes=None, executable=None, outlines=None):
+    """
+        Build floors and write them in a pool of processes, meshes stay in workers
+        a failing floor does not stop others
+        :param paths: list of output files, one per params, format from extension, see export.save
+        :return: generator of (index in params, number of tiles, number of faces,
+            build seconds, write seconds, error message or None)
+    """
+    if outlines is None:
+        outlines = [None] * len(params)
+    jobs = [(i, ) + job for i, job in enumerate(zip(params, outlines, paths))]
+    for result in _imap(_save_indexed, jobs, processes, executable):
+        yield result
+
+
+def _build_chunk(job):
+    i, d, state = job
+    t = time.perf_counter()
+    mesh = Chunk.from_state(state).mesh(d)
+    return i, mesh, time.perf_counter() - t
+
+
+def build_chunks(d, states, processes=None, executable=None, pool=None):
+    """
+        Mesh chunks of one floor in a pool of processes, yield results as they complete
+        :param d: FloorParams
+        :param states: list of Chunk.state()
+        :param pool: a pool to reuse, eg: shared_pool(), processes and executable are then ignored
+        :return: generator of (index in states, MeshData, seconds)
+    """
+    jobs = [(i, d, state) for i, state in enumerate(states)]
+    for result in _imap(_build_chunk, jobs, processes, executable, pool):
+        yield result
@@ -0,0 +1,100 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Plain floor parameters, usable without blender
+# ----------------------------------------------------------
+
+FOOT = 0.3048  # 1 foot in meters
+INCH = 0.0254  # 1 inch in meters
+
+# name and default value of every parameter, as in archipack_floor
+DEFAULTS = (
+    ('pattern', 'boards'),
+    ('width', 20 * FOOT),
+    ('length', 8 * FOOT),
+    ('spacing', 0.125 * INCH),
+    ('thickness', 1 * INCH),
+    ('vary_thickness', False),
+    ('thickness_variance', 25.0),
+    ('board_width', 6 * INCH),
+    ('vary_width', False),
+    ('width_variance', 50.0),
+    ('width_spacing', 0.125 * INCH),
+    ('board_length', 8 * FOOT),
+    ('short_board_length', 2 * FOOT),
+    ('vary_length', False),
+    ('length_variance', 50.0),
+    ('max_boards', 2),
+    ('length_spacing', 0.125 * INCH),
+    ('boards_in_group', 4),
+    ('tile_width', 1 * FOOT),
+    ('tile_length', 8 * INCH),
+    ('add_grout', False),
+    ('mortar_depth', 0.25 * INCH),
+    ('random_offset', False),
+    ('offset', 0.0),
+    ('offset_variance', 50.0),
+    ('random_uvs', True),
+    ('seed', 0),
+    ('bevel', False),
+    ('bevel_amount', 0.001)
+    )
+
+PARAMS = tuple(attr for attr, value in DEFAULTS)
+
+
+class FloorParams():
+    """
+        Floor parameters as plain attributes, same names, units (meters)
+        and defaults as archipack_floor, picklable
+            d = FloorParams(pattern='hexagon', tile_width=0.2)
+    """
+    def __init__(self, **kwargs):
+        for attr, value in DEFAULTS:
+            setattr(self, attr, kwargs.pop(attr, value))
+        if len(kwargs) > 0:
+            raise TypeError("Unknown floor parameters: {}".format(", ".join(sorted(kwargs))))
+
+    @staticmethod
+    def from_object(d):
+        """
+            Copy parameters of any object exposing them as attributes, eg: archipack_floor
+        """
+        return FloorParams(**{attr: getattr(d, attr) for attr in PARAMS})
+
+    def as_dict(self):
+        return {attr: getattr(self, attr) for attr in PARAMS}
+
+    def copy(self, **changes):
+        """
+            Copy with some parameters changed
+        """
+        params = self.as_dict()
+        params.update(changes)
+        return FloorParams(**params)
+
+    def __eq__(self, other):
+        return isinstance(other, FloorParams) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return "FloorParams({})".format(", ".join("{}={!r}".format(attr, getattr(self, attr)) for attr in PARAMS))
@@ -0,0 +1,305 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Vectorized floor patterns, no blender dependency
+# Every pattern takes d, any object exposing the archipack_floor
+# parameters as attributes, and returns a TileSet with tile ids
+# ----------------------------------------------------------
+import numpy as np
+from math import radians, cos, sin
+from .geometry import TileSet, rects
+from .motif import Motif, cell
+from .rng import BOARD_WIDTH, BOARD_LENGTH, ROW_OFFSET, hash_keys, streams
+
+# parameters changing tile outlines
+PATTERN_PARAMS = (
+    'pattern', 'width', 'length', 'spacing',
+    'board_width', 'vary_width', 'width_variance', 'width_spacing',
+    'board_length', 'short_board_length', 'vary_length', 'length_variance', 'max_boards', 'length_spacing',
+    'boards_in_group', 'tile_width', 'tile_length', 'random_offset', 'offset', 'offset_variance', 'seed'
+    )
+
+
+def row_count(d):
+    """
+        Number of rows of regular_tile
+    """
+    return int(np.count_nonzero(np.arange(int(d.length // (d.tile_length + d.spacing)) + 2) *
+                                (d.tile_length + d.spacing) < d.length))
+
+
+def regular_tile(d, rng=None, rows=None):
+    """
+     ____  ____  ____
+    |    ||    ||    | Regular tile, rows can be offset, either manually or randomly
+    |____||____||____|
+       ____  ____  ____
+      |    ||    ||    |
+      |____||____||____|
+    :param rows: (start, stop) range of rows to generate, default to every row
+    """
+    tw, tl, sp = d.tile_width, d.tile_length, d.spacing
+
+    # rows
+    start, stop = (0, row_count(d)) if rows is None else rows
+    row = np.arange(start, stop)
+    y = row * (tl + sp)
+    l = np.minimum(tl, d.length - y)
+
+    # width of first tile in each row
+    n_rows = len(y)
+    if d.random_offset:
+        v = tw * d.offset_variance * 0.0049
+        w0 = streams(d, rng).uniform(ROW_OFFSET, tw / 2 - v, tw / 2 + v, row)
+    else:
+        o = d.offset / 100
+        w0 = np.where(row % 2 == 1, tw * o, tw)
+    if n_rows == 0:
+        return TileSet(ids=np.zeros(0, dtype=np.uint64))
+
+    # columns, first one use w0 then full tiles
+    n_cols = int(max(d.width - w0.min() - sp, 0) // (tw + sp)) + 3
+    j = np.arange(n_cols)
+    x = np.where(j == 0, 0, w0[:, None] + sp + (j - 1) * (tw + sp))
+    w = np.where(j == 0, w0[:, None], tw)
+    w = np.minimum(w, d.width - x)
+
+    # zero width start tiles (no offset) still shift the row by spacing
+    keep = (x < d.width) & (w > 0)
+    y, l = np.broadcast_to(y[:, None], x.shape), np.broadcast_to(l[:, None], x.shape)
+    tiles = rects(x[keep], y[keep], w[keep], l[keep])
+    tiles.ids = hash_keys(row[:, None], j[None, :])[keep]
+    return tiles
+
+
+def _cover(draw, size, spacing, mean):
+    """
+        draw random sizes by batches until they cover size
+        :param draw: function returning random sizes of an index array
+        :param spacing: space between two consecutive sizes
+        :param mean: expected size, used to estimate the batch size
+    """
+    n = int(size // (mean + spacing)) + 2
+    sizes = draw(np.arange(n))
+    while sizes.sum() + spacing * len(sizes) < size:
+        sizes = np.concatenate((sizes, draw(np.arange(len(sizes), len(sizes) + n))))
+    return sizes
+
+
+def board_columns(d, rng=None):
+    """
+        x and width of every column of boards
+    """
+    bw, ws = d.board_width, d.width_spacing
+    if d.vary_width:
+        v = bw * (d.width_variance / 100) * 0.99
+        bw2 = _cover(lambda i: streams(d, rng).uniform(BOARD_WIDTH, bw - v, bw + v, i), d.width, ws, bw)
+    else:
+        bw2 = np.full(int(d.width // (bw + ws)) + 2, bw)
+    x = np.cumsum(bw2 + ws) - (bw2 + ws)
+    keep = x < d.width
+    return x[keep], np.minimum(bw2[keep], d.width - x[keep])
+
+
+def boards(d, rng=None, columns=None):
+    """
+    ||| Typical wood boards
+    |||
+    :param columns: (start, stop) range of columns to generate, default to every column
+    """
+    rng = streams(d, rng)
+    bl, ls = d.board_length, d.length_spacing
+
+    # columns
+    x, bw2 = board_columns(d, rng)
+    start, stop = (0, len(x)) if columns is None else columns
+    col = np.arange(start, stop)
+    x, bw2 = x[start:stop], bw2[start:stop]
+    n_cols = len(x)
+
+    # boards in each column, the last one of a column goes up to length
+    if d.vary_length:
+        v = bl * (d.length_variance / 100) * 0.99
+        bl2 = rng.uniform(BOARD_LENGTH, bl - v, bl + v, col[:, None], np.arange(d.max_boards)[None, :])
+        last = np.arange(d.max_boards) == d.max_boards - 1
+    else:
+        bl2 = np.full((n_cols, int(d.length // (bl + ls)) + 2), bl)
+        last = False
+    y = np.cumsum(bl2 + ls, axis=1) - (bl2 + ls)
+    bl2 = np.where(last | (y + bl2 > d.length), d.length - y, bl2)
+
+    keep = y < d.length
+    x, bw2 = np.broadcast_to(x[:, None], y.shape), np.broadcast_to(bw2[:, None], y.shape)
+    tiles = rects(x[keep], y[keep], bw2[keep], bl2[keep])
+    tiles.ids = hash_keys(col[:, None], np.arange(y.shape[1])[None, :])[keep]
+    return tiles
+
+
+def _quads(x, y, offsets):
+    """
+        TileSet of quads, offsets (4, 2) relative to every (x, y) start point
+    """
+    x, y = np.broadcast_arrays(x, y)
+    start = np.stack((x.ravel(), y.ravel()), axis=1)
+    return TileSet(start[:, None, :] + np.asarray(offsets, dtype=np.float64)[None, :, :])
+
+
+def hexagon_motif(d):
+    r"""
+      __  Hexagon tiles
+    /   \
+    \___/
+    """
+    sp, tw = d.spacing, d.tile_width
+    dia = (tw / 2) / cos(radians(30))
+    #               top of current, half way up next,    vertical spacing component
+    vertical_spacing = dia * (1 + sin(radians(30))) + (sp * sin(radians(60)))  # center of one row to next row
+    a = np.radians(np.arange(30, 360, 60))
+    base_points = np.stack((dia * np.cos(a), dia * np.sin(a)), axis=1)
+    return Motif(TileSet(base_points[None]), (tw + sp, 0), ((tw + sp) / 2, vertical_spacing), (-sp / 2, 0))
+
+
+def herringbone_motif(d):
+    """
+    Boards are at 45 degree angle, in chevron pattern, ends are angled
+    """
+    width_dif = d.board_width / cos(radians(45))
+    x_dif = d.short_board_length * cos(radians(45))
+    y_dif = d.short_board_length * sin(radians(45))
+    total_y_dif = width_dif + y_dif
+    sp_dif = d.spacing / cos(radians(45))
+
+    left = _quads(0, 0, [(0, 0), (x_dif, y_dif), (x_dif, total_y_dif), (0, width_dif)])
+    right = _quads(x_dif + d.spacing, 0, [(0, y_dif), (x_dif, 0), (x_dif, width_dif), (0, total_y_dif)])
+    # adjust spacing amount for 45 degree angle
+    return Motif(cell(left, right), (2 * (x_dif + d.spacing), 0), (0, width_dif + sp_dif), (0, -y_dif))
+
+
+def herringbone_parquet_motif(d):
+    """
+    Boards are at 45 degree angle, in chevron pattern, ends are square, not angled
+    """
+    x_dif = d.short_board_length * cos(radians(45))
+    y_dif = d.short_board_length * sin(radians(45))
+    y_dif_45 = d.board_width * cos(radians(45))
+    x_dif_45 = d.board_width * sin(radians(45))
+    total_y_dif = y_dif + y_dif_45
+
+    sp_dif = (d.spacing / cos(radians(45))) / 2  # divide by two since it is used for both x and y
+    width_dif = d.board_width / cos(radians(45))
+
+    left = _quads(0, 0, [(0, 0), (x_dif, y_dif), (x_dif - x_dif_45, total_y_dif), (-x_dif_45, y_dif_45)])
+    right = _quads(x_dif - x_dif_45 + sp_dif, y_dif - y_dif_45 - sp_dif,
+                   [(0, 0), (x_dif, -y_dif), (x_dif + x_dif_45, -y_dif + y_dif_45), (x_dif_45, y_dif_45)])
+    return Motif(cell(left, right), (2 * (x_dif + sp_dif), 0), (0, width_dif + 2 * sp_dif), (0, -y_dif))
+
+
+def hopscotch_motif(d):
+    """
+     ____  _  Large tile, plus small one on top right corner
+    |    ||_|
+    |____| ____  _  But shifted up so next large one is right below previous small one
+          |    ||_|
+          |____|
+    """
+    sp, tw, tl = d.spacing, d.tile_width, d.tile_length
+    s_tw = (tw - sp) / 2  # small tile width
+    s_tl = (tl - sp) / 2  # small tile length
+    return Motif(cell(rects(0, 0, tw, tl), rects(tw + sp, s_tl + sp, s_tw, s_tl)),
+                 (tw + sp, -(s_tl + sp)), (s_tw + sp, tl + sp))
+
+
+def stepping_stone_motif(d):
+    """
+     ____  __  ____
+    |    ||__||    | Row of large one, then two small ones stacked beside it
+    |    | __ |    |
+    |____||__||____|
+     __  __  __  __
+    |__||__||__||__| Row of smalls
+    """
+    sp, tw, tl = d.spacing, d.tile_width, d.tile_length
+    s_tw = (tw - sp) / 2
+    s_tl = (tl - sp) / 2
+    large = rects(0, 0, tw, tl)
+    stacked = rects(tw + sp, [0, s_tl + sp], s_tw, s_tl)
+    smalls = rects(np.arange(3) * (s_tw + sp), tl + sp, s_tw, s_tl)
+    return Motif(cell(large, stacked, smalls), (tw + s_tw + 2 * sp, 0), (0, tl + s_tl + 2 * sp))
+
+
+def windmill_motif(d):
+    """
+     __  ____
+    |  ||____| This also has a square one in the middle, totaling 5 tiles per pattern
+    |__|   __
+     ____ |  |
+    |____||__|
+    """
+    sp, tw, tl = d.spacing, d.tile_width, d.tile_length
+    s_tw = (tw - sp) / 2
+    s_tl = (tl - sp) / 2
+    tiles = cell(
+        rects(0, 0, tw, s_tl),  # bottom
+        rects(tw + sp, 0, s_tw, tl),  # right
+        rects(s_tw + sp, tl + sp, tw, s_tl),  # top
+        rects(0, s_tl + sp, s_tw, tl),  # left
+        rects(s_tw + sp, s_tl + sp, s_tw, s_tl)  # center
+        )
+    return Motif(tiles, (tw + s_tw + 2 * sp, 0), (0, tl + s_tl + 2 * sp))
+
+
+def square_parquet_motif(d):
+    """
+    ||--||-- Alternating groups oriented either horizontally, or forwards and backwards.
+    ||--||-- d.spacing is used because it is the same spacing for width and length
+    --||--|| Board width is calculated using number of boards and the length.
+    --||--||
+    """
+    sp, n = d.spacing, d.boards_in_group
+    bl = d.short_board_length
+    bw = (bl - (n - 1) * sp) / n
+    group = bl + sp
+    steps = np.arange(n) * (bw + sp)
+    return Motif(cell(rects(steps, 0, bw, bl), rects(group, steps, bl, bw)), (2 * group, 0), (group, group))
+
+
+MOTIFS = {
+    'hexagon': hexagon_motif,
+    'herringbone': herringbone_motif,
+    'herringbone_parquet': herringbone_parquet_motif,
+    'hopscotch': hopscotch_motif,
+    'stepping_stone': stepping_stone_motif,
+    'windmill': windmill_motif,
+    'square_parquet': square_parquet_motif
+    }
+
+
+def generate(d, rng=None):
+    """
+        TileSet of d.pattern, clipped to the floor
+    """
+    if d.pattern == 'boards':
+        return boards(d, rng)
+    elif d.pattern == 'regular_tile':
+        return regular_tile(d, rng)
+    return MOTIFS[d.pattern](d).fill(0, 0, d.width, d.length)
@@ -0,0 +1,315 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Solid tiles built from TileSet outlines
+# ----------------------------------------------------------
+import numpy as np
+from .geometry import MeshData, rects
+from .rng import THICKNESS, UV, streams
+
+TILE, GROUT = 0, 1  # material indexes
+
+
+def tile_thickness(d, ids, rng=None):
+    """
+        (n,) thickness of every tile, random when d.vary_thickness
+        :param ids: (n,) tile ids
+    """
+    if d.vary_thickness:
+        v = d.thickness_variance / 100 * d.thickness
+        return streams(d, rng).uniform(THICKNESS, d.thickness - v, d.thickness + v, ids)
+    return np.full(len(ids), d.thickness)
+
+
+def uv_offsets(d, ids, rng=None):
+    """
+        (n, 2) uv offset of every tile, random when d.random_uvs
+        :param ids: (n,) tile ids
+    """
+    if d.random_uvs:
+        return streams(d, rng).uniform(UV, 0, 1, np.asarray(ids)[:, None], np.arange(2)[None, :])
+    return np.zeros((len(ids), 2))
+
+
+def chamfer_amounts(tiles, amount, thickness):
+    """
+        (n,) chamfer of every tile, amount clamped so insets never overlap or invert:
+        half of area / perimeter, a lower bound of inradius for convex tiles,
+        half of the thickness, and half of the inset where the first edge collapses
+    """
+    pts = tiles.pts
+    perimeter = np.linalg.norm(pts - np.roll(pts, -1, axis=1), axis=2).sum(axis=1)
+    amount = np.minimum(amount, 0.5 * np.minimum(tiles.area() / perimeter, thickness))
+
+    # bisectors of both ends of an edge meet when the inset reaches length / shrink rate
+    n, k = pts.shape[:2]
+    counts = tiles.counts[:, None]
+    following = (np.arange(k)[None, :] + 1) % counts
+    rows = np.arange(n)[:, None]
+    miter = miters(tiles)
+    edge = pts[rows, following] - pts
+    size = np.linalg.norm(edge, axis=2)
+    shrink = -((miter[rows, following] - miter) * edge).sum(axis=2) / np.maximum(size, 1e-12)
+    collapse = np.where((shrink > 1e-12) & (np.arange(k) < counts), size / np.maximum(shrink, 1e-12), np.inf)
+    return np.minimum(amount, 0.5 * collapse.min(axis=1))
+
+
+def miters(tiles):
+    """
+        (n, k, 2) displacement of every tile point for an inset of 1
+    """
+    n, k = tiles.pts.shape[:2]
+    counts = tiles.counts[:, None]
+    rows = np.arange(n)[:, None]
+    j = np.arange(k)[None, :]
+    p = tiles.pts
+    nxt = p[rows, (j + 1) % counts] - p
+    prv = p - p[rows, (j - 1) % counts]
+    nxt /= np.maximum(np.linalg.norm(nxt, axis=2, keepdims=True), 1e-12)
+    prv /= np.maximum(np.linalg.norm(prv, axis=2, keepdims=True), 1e-12)
+    # inward normals of ccw edges, miter between them
+    n1 = np.stack((-prv[..., 1], prv[..., 0]), axis=2)
+    n2 = np.stack((-nxt[..., 1], nxt[..., 0]), axis=2)
+    return (n1 + n2) / (1 + (n1 * n2).sum(axis=2, keepdims=True))
+
+
+def inset(tiles, amount):
+    """
+        (nv, 2) points of every tile moved inward by amount, in TileSet point order
+        :param amount: (n,) inset distance of every tile
+    """
+    valid = np.arange(tiles.pts.shape[1]) < tiles.counts[:, None]
+    return (tiles.pts + amount[:, None, None] * miters(tiles))[valid]
+
+
+def prisms(tiles, thickness, bottom=True, matid=TILE, uv_factor=1, uv_offset=None, chamfer=0):
+    """
+        Closed prisms standing on z = 0, one per tile
+        faces are ordered: every top, every bottom (optional), every side, then every chamfer
+        uvs are planar on top and bottom, strip mapped around the sides and chamfers
+        :param tiles: TileSet
+        :param thickness: (n,) height of every tile
+        :param bottom: add bottom faces
+        :param uv_factor: uv scale
+        :param uv_offset: (n, 2) uv offset of every tile
+        :param chamfer: size of 45 degree chamfer around top faces, clamped per tile
+        :return: MeshData, with face normals and convexity
+    """
+    n, k = tiles.pts.shape[:2]
+    counts = tiles.counts
+    valid = np.arange(k) < counts[:, None]
+    nv = int(counts.sum())
+    if uv_offset is None:
+        uv_offset = np.zeros((n, 2))
+    thickness = np.asarray(thickness, dtype=np.float64)
+    c = chamfer_amounts(tiles, chamfer, thickness) if chamfer > 0 else None
+
+    # bottom ring, top ring, then chamfer ring, point j of tile i is at start[i] + j
+    verts = np.empty(((2 if c is None else 3) * nv, 3))
+    verts[:nv, 0:2] = tiles.pts[valid]
+    verts[:nv, 2] = 0
+    verts[nv:2 * nv, 2] = np.repeat(thickness, counts)
+    if c is None:
+        verts[nv:, 0:2] = verts[:nv, 0:2]
+        h = np.repeat(thickness, counts)
+    else:
+        verts[nv:2 * nv, 0:2] = inset(tiles, c)
+        verts[2 * nv:, 0:2] = verts[:nv, 0:2]
+        verts[2 * nv:, 2] = np.repeat(thickness - c, counts)
+        h = np.repeat(thickness - c, counts)
+
+    j = np.arange(k)
+    loops, totals, rev = _prism_faces(counts, bottom, c is not None)
+
+    # uvs, planar for caps
+    offset = np.repeat(uv_offset, counts, axis=0)
+    uvs = [verts[nv:2 * nv, 0:2] * uv_factor + offset]
+    if bottom:
+        uvs.append(verts[rev, 0:2] * uv_factor + offset[rev])
+
+    # sides, u along the perimeter and v along z
+    edge = np.linalg.norm(tiles.pts - np.roll(tiles.pts, -1, axis=1), axis=2)
+    edge = np.where(j < counts[:, None] - 1, edge, 0)
+    edge[np.arange(n), counts - 1] = np.linalg.norm(
+        tiles.pts[np.arange(n), counts - 1] - tiles.pts[:, 0], axis=1)
+    u0 = (np.cumsum(edge, axis=1) - edge)[valid]
+    u1 = u0 + edge[valid]
+    side = np.empty((nv, 4, 2))
+    side[:, :, 0] = np.stack((u0, u1, u1, u0), axis=1)
+    side[:, :, 1] = np.stack((np.zeros(nv), np.zeros(nv), h, h), axis=1)
+    uvs.append((side * uv_factor + offset[:, None, :]).reshape(-1, 2))
+
+    # chamfers, continue the side strip along the slope
+    if c is not None:
+        slope = h + np.repeat(c, counts) * np.sqrt(2)
+        side[:, :, 1] = np.stack((h, h, slope, slope), axis=1)
+        uvs.append((side * uv_factor + offset[:, None, :]).reshape(-1, 2))
+
+    # normals, caps along z following tile winding, sides outward of their bottom edge
+    rows = np.arange(n)[:, None]
+    following = (j + 1) % counts[:, None]
+    e = tiles.pts[rows, following] - tiles.pts
+    up = np.where(tiles.area() < 0, -1.0, 1.0)
+    cap = np.zeros((n, 3))
+    cap[:, 2] = up
+    side_normals = np.zeros((nv, 3))
+    side_normals[:, 0], side_normals[:, 1] = e[valid][:, 1], -e[valid][:, 0]
+    side_normals /= np.maximum(np.linalg.norm(side_normals, axis=1, keepdims=True), 1e-300)
+    normals = [cap, -cap] if bottom else [cap]
+    normals.append(side_normals)
+    if c is not None:
+        normals.append((side_normals + (0, 0, 1)) / np.sqrt(2))
+
+    # caps of tiles turning against their winding at a corner are concave, sides are always convex
+    turn = e[..., 0] * e[rows, following, 1] - e[..., 1] * e[rows, following, 0]
+    cap_convex = ((turn * up[:, None] >= -1e-12) | ~valid).all(axis=1)
+    caps = 2 if bottom else 1
+    convex = np.ones(len(totals), dtype=bool)
+    convex[:caps * n] = np.tile(cap_convex, caps)
+
+    return MeshData(verts, loops, totals, np.full(len(totals), matid, dtype=np.int64),
+                    np.concatenate(uvs), np.concatenate(normals), convex)
+
+
+def _prism_faces(counts, bottom=True, chamfered=False):
+    """
+        Faces of prisms of tiles with counts corners, see prisms
+        :return: loops, totals, (nv,) corner of the bottom face loops
+    """
+    nv = int(counts.sum())
+    start = np.repeat(np.cumsum(counts) - counts, counts)
+    size = np.repeat(counts, counts)
+    cur = np.arange(nv)
+    j = cur - start
+    nxt = start + (j + 1) % size
+    rev = start + size - 1 - j
+    mid = 2 * nv if chamfered else nv
+
+    faces, totals = [cur + nv], [counts]
+    if bottom:
+        faces.append(rev)
+        totals.append(counts)
+    faces.append(np.stack((cur, nxt, nxt + mid, cur + mid), axis=1).ravel())
+    totals.append(np.full(nv, 4, dtype=np.int64))
+    if chamfered:
+        faces.append(np.stack((cur + mid, nxt + mid, nxt + nv, cur + nv), axis=1).ravel())
+        totals.append(np.full(nv, 4, dtype=np.int64))
+    return np.concatenate(faces), np.concatenate(totals).astype(np.int64), rev
+
+
+def loop_values(values, counts, bottom=True, chamfered=False):
+    """
+        (l, ...) values of every loop of prisms of tiles with counts corners
+        :param values: (n, ...) value of every tile
+    """
+    caps = [np.repeat(values, counts, axis=0)] * (2 if bottom else 1)
+    sides = [np.repeat(values, 4 * counts, axis=0)] * (2 if chamfered else 1)
+    return np.concatenate(caps + sides)
+
+
+def merge_prisms(a, a_counts, keep, b, b_counts, bottom=True, chamfered=False):
+    """
+        Prisms of tiles a[keep] followed by tiles b, from prisms of a and b
+        built with the same bottom and chamfer, equal to prisms() of these tiles
+        :param a: MeshData of prisms of tiles with a_counts corners
+        :param keep: (na,) bool, tiles of a to keep
+        :param b: MeshData of prisms of tiles with b_counts corners
+        :return: MeshData, counts of its tiles
+    """
+    counts = np.concatenate((a_counts[keep], b_counts))
+    # index of kept rows of a, sizes of a and b, per tile and per corner
+    tiles = (np.flatnonzero(keep), len(keep), len(b_counts))
+    corners = (np.flatnonzero(np.repeat(keep, a_counts)), int(a_counts.sum()), int(b_counts.sum()))
+    caps = [tiles] * (2 if bottom else 1)
+    sides = [corners] * (2 if chamfered else 1)
+
+    def blocks(x, y, sizes, width=1):
+        # x and y are made of blocks of width rows per tile or corner, keep rows of x at index
+        parts, ia, ib = [], 0, 0
+        for index, size_a, size_b in sizes:
+            if width > 1:
+                index = (index[:, None] * width + np.arange(width)).ravel()
+            parts.append(x.take(index + ia, axis=0))
+            parts.append(y[ib:ib + size_b * width])
+            ia += size_a * width
+            ib += size_b * width
+        return np.concatenate(parts)
+
+    loops, totals = _prism_faces(counts, bottom, chamfered)[:2]
+    uvs = len(caps) * corners[1], len(caps) * corners[2]
+    return MeshData(blocks(a.verts, b.verts, [corners] * (3 if chamfered else 2)), loops, totals,
+                    blocks(a.matids, b.matids, caps + sides),
+                    np.concatenate((blocks(a.uvs, b.uvs, [corners] * len(caps)),
+                                    blocks(a.uvs[uvs[0]:], b.uvs[uvs[1]:], sides, 4))),
+                    blocks(a.normals, b.normals, caps + sides),
+                    blocks(a.convex, b.convex, caps + sides)), counts
+
+
+def grout_area(d, outline=None):
+    """
+        TileSet covered by grout
+        :param outline: Outline of the floor, default to the d.width x d.length rectangle
+    """
+    return rects(0, 0, d.width, d.length) if outline is None else outline.area_tiles()
+
+
+def grout(d, uv_factor=1, outline=None, area=None):
+    """
+        Grout block under the tiles, mortar_depth below tile surface
+        :param area: TileSet covered by grout, default to grout_area(d, outline)
+    """
+    z = d.thickness - d.mortar_depth
+    if area is None:
+        area = grout_area(d, outline)
+    if z <= 0 or len(area) == 0:
+        return None
+    return prisms(area, np.full(len(area), z), matid=GROUT, uv_factor=uv_factor)
+
+
+def uv_factor(d, outline=None):
+    """
+        uv scale of a floor, automatically scaled to keep within reasonable bounds
+    """
+    if outline is None:
+        return 1 / max(d.width, d.length)
+    return 1 / max(outline.bounds[2:4] - outline.bounds[0:2])
+
+
+def floor_mesh(d, tiles, rng=None, outline=None, factor=None, area=None):
+    """
+        Closed tiles with uvs and chamfers, tops come first, then grout
+        :param tiles: TileSet of d.pattern
+        :param outline: Outline tiles were clipped to
+        :param factor: uv scale, default to uv_factor(d, outline)
+        :param area: TileSet covered by grout, default to grout_area(d, outline)
+        :return: MeshData
+    """
+    if factor is None:
+        factor = uv_factor(d, outline)
+    mesh = prisms(tiles, tile_thickness(d, tiles.ids, rng), uv_factor=factor,
+                  uv_offset=uv_offsets(d, tiles.ids, rng), chamfer=d.bevel_amount if d.bevel else 0)
+    if d.add_grout:
+        block = grout(d, factor, outline, area)
+        if block is not None:
+            mesh = MeshData.concatenate([mesh, block])
+    return mesh
@@ -0,0 +1,99 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Counter based random streams
+# A value only depends on seed, stream and integer keys (eg: tile index),
+# not on how many values were drawn before, so floors are reproducible
+# and existing tiles keep their values when the floor grows
+# ----------------------------------------------------------
+import numpy as np
+
+# streams, one per random feature
+THICKNESS = 1
+UV = 2
+BOARD_WIDTH = 3
+BOARD_LENGTH = 4
+ROW_OFFSET = 5
+
+_GOLDEN = np.uint64(0x9e3779b97f4a7c15)
+_M1 = np.uint64(0xbf58476d1ce4e5b9)
+_M2 = np.uint64(0x94d049bb133111eb)
+
+
+def _uint64(a):
+    """
+        int array as uint64, negative values wrap around
+    """
+    a = np.asarray(a)
+    if a.dtype == np.uint64:
+        return a
+    return a.astype(np.int64).view(np.uint64)
+
+
+def _mix(x):
+    """
+        splitmix64 finalizer, x: uint64 array
+    """
+    x = (x ^ (x >> np.uint64(30))) * _M1
+    x = (x ^ (x >> np.uint64(27))) * _M2
+    return x ^ (x >> np.uint64(31))
+
+
+def hash_keys(*keys):
+    """
+        uint64 hash of integer keys, broadcast together
+            hash_keys(i, j, k)
+    """
+    keys = np.broadcast_arrays(*[np.atleast_1d(_uint64(k)) for k in keys])
+    h = np.full(keys[0].shape, _GOLDEN)
+    for k in keys:
+        h = _mix(h ^ (k + _GOLDEN))
+    return h
+
+
+class Streams():
+    """
+        Random streams of a floor
+            rng = Streams(d.seed)
+            thickness = rng.uniform(THICKNESS, low, high, tiles.ids)
+    """
+    def __init__(self, seed=0):
+        self.seed = int(seed)
+
+    def uniform(self, stream, low, high, *keys):
+        """
+            Floats in [low, high), one per broadcast key
+        """
+        h = hash_keys(self.seed, stream, *keys)
+        # 53 high bits as a double in [0, 1)
+        r = (h >> np.uint64(11)).astype(np.float64) * (1.0 / 9007199254740992)
+        return low + (high - low) * r
+
+
+def streams(d, rng=None):
+    """
+        rng or the streams of d.seed
+    """
+    if rng is None:
+        return Streams(d.seed)
+    return rng
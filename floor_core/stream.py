@@ -0,0 +1,207 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Streaming generation
+# Floors are produced in batches of about batch tiles, so consumers
+# work on floors of any size with bounded memory:
+#   for tiles in stream.tiles(d):
+#       ...
+#   mesh = stream.mesh(d, scratch=Scratch('/tmp'))
+# Batches of boards are ranges of columns, of regular tiles ranges of rows
+# and of motifs bands along y, tiles go to the band holding their centroid
+# ----------------------------------------------------------
+import os
+import tempfile
+import numpy as np
+from .geometry import TileSet, MeshData
+from .clipping import clip_rect
+from .patterns import MOTIFS, row_count, board_columns, regular_tile, boards
+from .prism import uv_factor, floor_mesh, grout
+from .chunks import centroids
+
+BATCH = 65536  # default number of tiles of a batch
+
+
+def _motif_tiles(d, batch):
+    motif = MOTIFS[d.pattern](d)
+    per_cell = len(motif.cell)
+    cell_area = abs(motif.a[0] * motif.b[1] - motif.a[1] * motif.b[0])
+    height = max(batch * cell_area / (per_cell * max(d.width, 1e-9)), 1e-3)
+    y0 = 0
+    while y0 < d.length:
+        y1 = min(y0 + height, d.length)
+        tiles = motif.tiles(0, y0, d.width, y1)
+        y = centroids(tiles)[:, 1]
+        keep = (y >= y0) & ((y < y1) | (y1 >= d.length))
+        if y0 == 0:
+            keep |= y < 0
+        tiles = clip_rect(tiles.select(keep), 0, 0, d.width, d.length)
+        if len(tiles) > 0:
+            yield tiles
+        y0 = y1
+
+
+def tiles(d, batch=BATCH, rng=None, outline=None):
+    """
+        TileSet batches of d.pattern, together the tiles of patterns.generate(d)
+        :param batch: about the number of tiles of a batch
+        :param outline: Outline to clip tiles to, as outline.fill(d)
+        :return: generator of TileSet
+    """
+    if outline is not None:
+        origin = outline.bounds[0:2]
+        for part in tiles(outline.params(d), batch, rng):
+            part.pts += origin
+            part = outline.clip(part)
+            if len(part) > 0:
+                yield part
+        return
+
+    if d.pattern == 'boards':
+        n = len(board_columns(d, rng)[0])
+        per_column = d.max_boards if d.vary_length else int(d.length // (d.board_length + d.length_spacing)) + 2
+        step = max(1, batch // max(per_column, 1))
+        for start in range(0, n, step):
+            yield boards(d, rng, (start, min(start + step, n)))
+    elif d.pattern == 'regular_tile':
+        n = row_count(d)
+        step = max(1, batch // (int(d.width // (d.tile_width + d.spacing)) + 3))
+        for start in range(0, n, step):
+            yield regular_tile(d, rng, (start, min(start + step, n)))
+    else:
+        for part in _motif_tiles(d, batch):
+            yield part
+
+
+def meshes(d, batch=BATCH, rng=None, outline=None):
+    """
+        MeshData batches of closed tiles, grout comes last as its own batch
+        :return: generator of MeshData
+    """
+    factor = uv_factor(d, outline)
+    for part in tiles(d, batch, rng, outline):
+        yield floor_mesh(d, part, rng, factor=factor, area=TileSet())
+    if d.add_grout:
+        block = grout(d, factor, outline)
+        if block is not None:
+            yield block
+
+
+class Scratch():
+    """
+        Arrays growing batch by batch, in memory or in files of directory
+        for results larger than memory, files are removed on close
+            scratch = Scratch(directory)
+            scratch.append('verts', verts)
+            verts = scratch.array('verts')  # np.memmap when directory is set
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.parts = {}
+        self.files = {}
+        self.layout = {}
+
+    def append(self, name, a):
+        a = np.ascontiguousarray(a)
+        dtype, shape, count = self.layout.get(name, (a.dtype, a.shape[1:], 0))
+        if a.dtype != dtype or a.shape[1:] != shape:
+            raise ValueError("Scratch {} expects {} {} rows, got {} {}".format(name, dtype, shape, a.dtype, a.shape))
+        self.layout[name] = (dtype, shape, count + len(a))
+        if self.directory is None:
+            self.parts.setdefault(name, []).append(a)
+            return
+        f = self.files.get(name)
+        if f is None:
+            f = self.files[name] = tempfile.NamedTemporaryFile(
+                dir=self.directory, prefix='floor_{}_'.format(name), suffix='.bin', delete=False)
+        f.write(a.tobytes())
+
+    def __len__(self):
+        return len(self.layout)
+
+    def count(self, name):
+        return self.layout[name][2] if name in self.layout else 0
+
+    def array(self, name):
+        """
+            every row appended to name
+        """
+        dtype, shape, count = self.layout[name]
+        if self.directory is None:
+            return np.concatenate(self.parts[name])
+        f = self.files[name]
+        f.flush()
+        if count == 0:
+            return np.zeros((0, ) + shape, dtype=dtype)
+        return np.memmap(f.name, dtype=dtype, mode='r', shape=(count, ) + shape)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+            os.remove(f.name)
+        self.parts.clear()
+        self.files.clear()
+        self.layout.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def mesh(d, batch=BATCH, rng=None, outline=None, scratch=None):
+    """
+        MeshData of the whole floor built batch by batch into scratch,
+        arrays are memory mapped when scratch has a directory, keep scratch open while using them
+    """
+    if scratch is None:
+        scratch = Scratch()
+    offset = 0
+    for part in meshes(d, batch, rng, outline):
+        scratch.append('verts', part.verts)
+        scratch.append('loops', part.loops + offset)
+        scratch.append('totals', part.totals)
+        scratch.append('matids', part.matids)
+        scratch.append('uvs', part.uvs)
+        scratch.append('normals', part.normals)
+        scratch.append('convex', part.convex)
+        offset += len(part.verts)
+    if scratch.count('verts') == 0:
+        return MeshData(np.zeros((0, 3)), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                        uvs=np.zeros((0, 2)))
+    return MeshData(*[scratch.array(name) for name in
+                      ('verts', 'loops', 'totals', 'matids', 'uvs', 'normals', 'convex')])
+
+
+def quantities(d, batch=BATCH, rng=None, outline=None):
+    """
+        Tile count, area covered by tiles and total length of tile sides, in bounded memory
+        :return: dict
+    """
+    count, area, perimeter = 0, 0, 0
+    for part in tiles(d, batch, rng, outline):
+        count += len(part)
+        area += part.area().sum()
+        perimeter += np.linalg.norm(part.pts - np.roll(part.pts, -1, axis=1), axis=2).sum()
+    return {'tiles': count, 'area': float(area), 'perimeter': float(perimeter)}
@@ -0,0 +1,76 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Lightweight per stage timers
+# ----------------------------------------------------------
+import time
+from contextlib import contextmanager
+
+
+class Stage():
+    """
+        Last run of a stage
+        seconds: wall time
+        verts, faces: size of the stage output, when it makes sense
+    """
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0
+        self.verts = 0
+        self.faces = 0
+
+    @property
+    def ms(self):
+        return 1000 * self.seconds
+
+    def __repr__(self):
+        return "{}: {:.2f} ms, {} verts, {} faces".format(self.name, self.ms, self.verts, self.faces)
+
+
+class StageTimer():
+    """
+        Time consecutive stages
+            timer = StageTimer()
+            with timer.stage('pattern') as s:
+                tiles = generate(d)
+                s.faces = len(tiles)
+    """
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        s = Stage(name)
+        t = time.perf_counter()
+        try:
+            yield s
+        finally:
+            s.seconds = time.perf_counter() - t
+            self.stages.append(s)
+
+    @property
+    def seconds(self):
+        return sum(s.seconds for s in self.stages)
+
+    def __repr__(self):
+        return "\n".join(repr(s) for s in self.stages)
@@ -27,6 +27,7 @@
 import bpy
 import bgl
 import blf
+import time
 from math import sin, cos, atan2, pi
 from mathutils import Vector, Matrix
 from mathutils.geometry import intersect_line_plane, intersect_point_line, intersect_line_sphere
@@ -38,6 +39,8 @@ from bpy.props import EnumProperty, FloatVectorProperty, StringProperty, Collect
 arrow_size = 0.1
 # Handle area size (pixels)
 handle_size = 10
+# Max data updates per second while dragging a handle
+preview_fps = 15
 
 # ------------------------------------------------------------------
 # Define Gl Handle types
@@ -373,6 +376,9 @@ class Manipulator():
         self.glprovider = glprovider
         self.origin = Vector((0, 0, 1))
         self.mouse_pos = Vector((0, 0))
+        # throttle updates while dragging, value waiting for next update
+        self.last_update = 0
+        self.pending = None
         args = (self, context)
         self._handle = bpy.types.SpaceView3D.draw_handler_add(self.draw_callback, args, 'WINDOW', 'POST_PIXEL')
 
@@ -450,6 +456,29 @@ class Manipulator():
         except:
             pass
 
+    def set_value_throttled(self, context, data, attr, value, index=-1):
+        """
+            set_value at most preview_fps times a second,
+            keep last value pending, call flush_value on release
+        """
+        if time.time() - self.last_update < 1 / preview_fps:
+            self.pending = (data, attr, value, index)
+            return
+        self.pending = None
+        self.set_value(context, data, attr, value, index)
+        # measure from end of update so slow updates leave time for events
+        self.last_update = time.time()
+
+    def flush_value(self, context):
+        """
+            set pending value of set_value_throttled if any
+        """
+        if self.pending is not None:
+            data, attr, value, index = self.pending
+            self.pending = None
+            self.set_value(context, data, attr, value, index)
+        self.last_update = 0
+
     def preTranslate(self, tM, vec):
         return tM * Matrix([
         [1, 0, 0, vec.x],
@@ -488,6 +517,8 @@ class SizeManipulator(Manipulator):
         return False
 
     def release(self, context, event):
+        if self.handle_right.active:
+            self.flush_value(context)
         self.check_hover()
         self.handle_right.active = False
         return False
@@ -510,7 +541,7 @@ class SizeManipulator(Manipulator):
         length = (self.line_0.p - pt).length
         if event.alt:
             length = round(length, 1)
-        self.set_value(context, self.datablock, self.glprovider.prop1_name, length)
+        self.set_value_throttled(context, self.datablock, self.glprovider.prop1_name, length)
 
     def draw_callback(self, _self, context):
         """
@@ -633,6 +664,10 @@ class Manipulable():
             default=False,
             description="Flag enable to rebuild manipulators when data model change"
             )
+    manipulable_preview = BoolProperty(
+            default=False,
+            description="Flag enabled while a handle is active, show a cheap preview until release"
+            )
 
     def manipulable_disable(self, context):
         """
@@ -680,16 +715,19 @@ class Manipulable():
         if event.type in {'RIGHTMOUSE', 'ESC'}:
             self.manipulable_disable(context)
             self.manipulable_exit(context)
+            self.manipulable_preview = False
             return {'FINISHED'}
 
         for m in self.manip_stack:
             if m.modal(context, event):
+                self.manipulable_preview = True
                 self.manipulable_manipulate(context, type=type(m).__name__)
                 return {'RUNNING_MODAL'}
 
         # allow any action on release
         if event.type == 'LEFTMOUSE' and event.value == 'RELEASE':
             self.manipulable_release(context)
+            self.manipulable_preview = False
 
         return {'PASS_THROUGH'}
 
@@ -697,7 +735,7 @@ class Manipulable():
     def manipulable_release(self, context):
         """
             Override with action to do on mouse release
-            eg: big update
+            eg: big update when manipulable_preview is set
         """
         return
 